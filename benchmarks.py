@@ -0,0 +1,247 @@
+"""Module providing a benchmark suite of the solver, policy extraction, simulation and storage paths, compared with a saved baseline."""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import timeit
+from typing import Callable
+
+import numpy as np
+
+from optimal_policy import extract_optimal_policy, extract_policy_table
+from pig_game import PigGame, PigPlayer
+from utilities import competition, load_value_function, store_value_function
+from value_iteration import value_iteration
+
+# Problem sizes (goals) of the suite
+GOALS = (20, 50, 100)
+
+# Roll outcome distribution of the Piglet coin (see piglet_manual.py)
+PIGLET_COIN = np.array([0.5, 0.5])
+
+
+def time_call(function: Callable[[], object], repeat: int = 3, budget: float = 5.0) -> float:
+    """Time a function, returning the best of several measurements of the mean run time.
+
+    Fast functions are called several times per measurement, so that each measurement takes at
+    least 0.2 seconds (see timeit.Timer.autorange).
+
+    Args:
+        function (Callable[[], object]): Function to time.
+        repeat (int, optional): Largest number of measurements. Defaults to 3.
+        budget (float, optional): Stop repeating once the measurements have taken this many
+            seconds. Defaults to 5.0.
+
+    Returns:
+        float: Shortest mean run time in seconds.
+    """
+    timer = timeit.Timer(function)
+    number, total = timer.autorange()
+    times = [total / number]
+    while len(times) < repeat and total * len(times) < budget:
+        times.append(timer.timeit(number) / number)
+    return min(times)
+
+
+def benchmark_simulation(
+    player_1_strategy: str = "holdAt20",
+    player_2_strategy: str = "rolls",
+    policy=None,
+    games: int = 2000,
+    target: int = 100,
+) -> float:
+    """Time PigGame.simulate and return the number of games simulated per second.
+
+    Args:
+        player_1_strategy (str, optional): Player 1 strategy. Defaults to "holdAt20".
+        player_2_strategy (str, optional): Player 2 strategy. Defaults to "rolls".
+        policy (optional): Optimal Pig play policy for optimal players. Defaults to None.
+        games (int, optional): Number of games to simulate. Defaults to 2000.
+        target (int, optional): Goal of the game to win. Defaults to 100.
+
+    Returns:
+        float: Games simulated per second.
+    """
+    start = time.perf_counter()
+    for _ in range(games):
+        players = [
+            PigPlayer(
+                name=f"player_{n}",
+                target=target,
+                strategy=strategy,
+                policy=policy if strategy == "optimal" else None,
+            )
+            for n, strategy in enumerate([player_1_strategy, player_2_strategy], start=1)
+        ]
+        PigGame(players=players, target=target, print_terminal=False).simulate()
+    return games / (time.perf_counter() - start)
+
+
+def benchmark_competition(
+    player_1_strategy: str = "optimal",
+    player_2_strategy: str = "holdAt20",
+    policy=None,
+    games: int = 2000,
+    target: int = 100,
+) -> float:
+    """Time utilities.competition and return the number of games played per second.
+
+    Args:
+        player_1_strategy (str, optional): Player 1 strategy. Defaults to "optimal".
+        player_2_strategy (str, optional): Player 2 strategy. Defaults to "holdAt20".
+        policy (optional): Optimal Pig play policy for optimal players. Defaults to None.
+        games (int, optional): Number of games to play. Defaults to 2000.
+        target (int, optional): Goal of the game to win. Defaults to 100.
+
+    Returns:
+        float: Games played per second.
+    """
+    start = time.perf_counter()
+    competition(
+        player_1_strategy,
+        player_2_strategy,
+        optimal_policy=policy,
+        target=target,
+        rounds=games,
+        seed=0,
+    )
+    return games / (time.perf_counter() - start)
+
+
+def run_suite(
+    goals: tuple[int, ...] = GOALS, games: int = 2000, repeat: int = 3
+) -> list[dict]:
+    """Run the benchmark suite.
+
+    Args:
+        goals (tuple[int, ...], optional): Problem sizes to run each benchmark at. Defaults to GOALS.
+        games (int, optional): Number of games of the simulation benchmarks. Defaults to 2000.
+        repeat (int, optional): Largest number of runs of each timing. Defaults to 3.
+
+    Returns:
+        list[dict]: Result per benchmark and goal, with the "name", "goal" and "seconds" taken (and
+            "games_per_second" for the simulation benchmarks).
+    """
+    results = []
+
+    def record(name: str, goal: int, seconds: float, **extra):
+        results.append({"name": name, "goal": goal, "seconds": seconds, **extra})
+        print(f"{name:<30} goal {goal:>4}: {seconds:10.4f} s", file=sys.stderr)
+
+    for goal in goals:
+        # Value iteration behind pig_manual.py and piglet_manual.py
+        for method in ["sweep", "layered", "dirty"]:
+            seconds = time_call(lambda: value_iteration(goal=goal, method=method), repeat)
+            record(f"solve/pig/{method}", goal, seconds)
+        seconds = time_call(
+            lambda: value_iteration(goal=goal, probabilities=PIGLET_COIN), repeat
+        )
+        record("solve/piglet/sweep", goal, seconds)
+
+        # Policy extraction
+        V, _, _, _ = value_iteration(goal=goal, method="layered")
+        record("extract/dict", goal, time_call(lambda: extract_optimal_policy(V, goal=goal), repeat))
+        record("extract/table", goal, time_call(lambda: extract_policy_table(V, goal=goal), repeat))
+        table = extract_policy_table(V, goal=goal)
+
+        # Simulation, reported as games per second
+        for name, strategies in [
+            ("simulate/holdAt20-rolls", ("holdAt20", "rolls")),
+            ("simulate/optimal-holdAt20", ("optimal", "holdAt20")),
+        ]:
+            rate = benchmark_simulation(*strategies, policy=table, games=games, target=goal)
+            record(name, goal, games / rate, games_per_second=rate)
+        rate = benchmark_competition("optimal", "holdAt20", policy=table, games=games, target=goal)
+        record("competition/optimal-holdAt20", goal, games / rate, games_per_second=rate)
+
+        # Storage round trips
+        with tempfile.TemporaryDirectory() as directory:
+            for extension in [".json", ".bin"]:
+                filename = os.path.join(directory, f"goal_{goal}{extension}")
+                store = time_call(lambda: store_value_function(filename, V), repeat)
+                load = time_call(lambda: load_value_function(filename), repeat)
+                record(f"store/{extension[1:]}", goal, store)
+                record(f"load/{extension[1:]}", goal, load)
+
+    return results
+
+
+def compare_to_baseline(
+    results: list[dict], baseline: list[dict], tolerance: float = 0.5
+) -> list[str]:
+    """Compare benchmark results with a baseline run.
+
+    Args:
+        results (list[dict]): Results from run_suite.
+        baseline (list[dict]): Results of the baseline run.
+        tolerance (float, optional): Allowed relative slowdown. Defaults to 0.5.
+
+    Returns:
+        list[str]: Description of every benchmark slower than the baseline by more than the tolerance.
+    """
+    reference = {(result["name"], result["goal"]): result["seconds"] for result in baseline}
+    regressions = []
+    for result in results:
+        key = (result["name"], result["goal"])
+        if key in reference and result["seconds"] > reference[key] * (1 + tolerance):
+            regressions.append(
+                f"{result['name']} goal {result['goal']}: {result['seconds']:.4f} s "
+                f"vs baseline {reference[key]:.4f} s ({result['seconds'] / reference[key]:.2f}x)"
+            )
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the benchmark suite from the command line.
+
+    Args:
+        argv (list[str] | None, optional): Command line arguments. Defaults to None (sys.argv).
+
+    Returns:
+        int: Exit code, 1 if any benchmark regressed against the baseline.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--goals", type=int, nargs="+", default=list(GOALS), help="Problem sizes.")
+    parser.add_argument("--games", type=int, default=2000, help="Games per simulation benchmark.")
+    parser.add_argument("--repeat", type=int, default=3, help="Largest number of runs per timing.")
+    parser.add_argument("--output", help="File to write the JSON results to (default: stdout).")
+    parser.add_argument("--baseline", help="JSON results of a previous run to compare with.")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.5, help="Allowed relative slowdown vs the baseline."
+    )
+    args = parser.parse_args(argv)
+
+    report = {
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+        },
+        "results": run_suite(tuple(args.goals), games=args.games, repeat=args.repeat),
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare_to_baseline(report["results"], baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
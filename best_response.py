@@ -0,0 +1,113 @@
+"""Module providing the best response to a fixed Pig strategy, the policy that maximises the win probability against it."""
+
+import numpy as np
+
+from pig_game import PigPlayer
+from policy_evaluation import turn_outcomes, win_probability
+from solver import solve
+from value_iteration import layer_scores, roll_distribution, solve_layer
+
+
+def best_response(
+    opponent: PigPlayer,
+    goal: int = 100,
+    dice_sides: int = 6,
+    number_dice: int = 1,
+    epsilon: float = 1e-12,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Compute the value function and policy that maximise the win probability against a fixed strategy.
+
+    The opponent's turns are collapsed into the distribution of the points they bank from each pair
+    of scores (see policy_evaluation.turn_outcomes), leaving a one-player problem over the states
+    (i, j, k) of the player's own turns. Scores never decrease, so the turn start states are solved
+    in one pass in decreasing order of the banked total i + j. Within a total the only coupling is a
+    turn in which neither player banks anything, which returns to the same state, so each turn start
+    value is the fixed point of a single piecewise linear equation, solved exactly by Newton steps
+    (see value_iteration.solve_layer).
+
+    Args:
+        opponent (PigPlayer): Opponent whose strategy, dice and policy to use.
+        goal (int, optional): The number of points required to win. Defaults to 100.
+        dice_sides (int, optional): Number of dice sides of the player. Defaults to 6.
+        number_dice (int, optional): Number of dice per roll of the player. Defaults to 1.
+        epsilon (float, optional): Convergence parameter of the Newton steps. Defaults to 1e-12.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Value function of shape (goal, goal, goal), and roll decisions
+            of the same shape (True where rolling is best, usable as a PigPlayer policy), both
+            indexed [player's score, opponent's score, turn total].
+    """
+    probabilities = roll_distribution(dice_sides, number_dice)
+    failure, banked = turn_outcomes(opponent, goal=goal)
+    size = banked.shape[2]
+
+    # Probability that the opponent's turn banks nothing, returning to the same turn start state,
+    # indexed [opponent's score, player's score] as the turn outcomes are
+    stay = failure + banked[:, :, 0]
+
+    # Turn start values, padded so that the opponent banking past the goal reads as a loss (value 0)
+    turn_start = np.zeros((goal, goal + size))
+
+    # Value of passing the turn with a banked score, padded so that banking past the goal reads as a win
+    passing = np.ones((2 * goal, goal))
+
+    V = np.ones((goal, goal, goal))
+    rolls = np.zeros((goal, goal, goal), dtype=bool)
+
+    for total in range(2 * goal - 2, -1, -1):
+        scores = layer_scores(total, goal)
+        opponent_scores = total - scores
+
+        # Value of the opponent banking a positive total, which leaves the layer
+        gains = np.arange(1, size)
+        moved = (
+            banked[opponent_scores, scores][:, 1:]
+            * turn_start[scores[:, None], opponent_scores[:, None] + gains]
+        ).sum(axis=1)
+        coefficient = stay[opponent_scores, scores]
+
+        # Holding with a positive turn total leaves the layer too
+        hold_fixed = passing[scores[:, None] + np.arange(goal), opponent_scores[:, None]]
+
+        # Passing with nothing banked is worth coefficient * x + moved, x the turn start value
+        values, roll_val, hold_val, _ = solve_layer(
+            values=np.zeros((len(scores), goal)),
+            hold_fixed=hold_fixed,
+            scores=scores,
+            goal=goal,
+            probabilities=probabilities,
+            epsilon=epsilon,
+            pass_coefficient=coefficient,
+            pass_constant=moved,
+            partner=np.arange(len(scores)),
+        )
+
+        V[scores, opponent_scores] = values
+        rolls[scores, opponent_scores] = roll_val > hold_val
+        turn_start[scores, opponent_scores] = values[:, 0]
+        passing[scores, opponent_scores] = coefficient * values[:, 0] + moved
+
+    return V, rolls
+
+
+def exploitation_gain(opponent: PigPlayer, goal: int = 100) -> tuple[float, float]:
+    """Compare the best response to a fixed strategy with the optimal (minimax) policy.
+
+    Args:
+        opponent (PigPlayer): Opponent whose strategy, dice and policy to use.
+        goal (int, optional): The number of points required to win. Defaults to 100.
+
+    Returns:
+        tuple[float, float]: Exact probability that the best response wins, and that the optimal
+            policy wins, against the opponent when starting the game.
+    """
+    V, _ = best_response(opponent, goal=goal)
+
+    # The optimal policy as a dense array of roll decisions, exact in the states where the hold
+    # threshold table is not (see optimal_policy.find_non_monotone_states)
+    _, V_roll, V_hold = solve(game="pig", goal=goal)
+    optimal = PigPlayer(
+        "optimal", target=goal, strategy="optimal", policy=np.asarray(V_roll > V_hold)
+    )
+    return float(V[0, 0, 0]), win_probability(optimal, opponent, goal=goal)
+
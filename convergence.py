@@ -0,0 +1,171 @@
+"""Module providing a streaming tracker of the convergence of value iteration, stored in an append-only binary file.
+
+File layout:
+    - 8 byte magic string b"PIGTRACK".
+    - 4 byte little-endian length of the header.
+    - JSON header (shape of the value function, flat indices of the tracked states and metadata),
+      padded with spaces to a multiple of 8 bytes.
+    - One float64 record per iteration: iteration, delta, wall time since the start of the solve,
+      followed by the values of the tracked states.
+"""
+
+import json
+import os
+import struct
+import time
+
+import numpy as np
+
+MAGIC = b"PIGTRACK"
+_FIELDS = 3  # iteration, delta, wall time
+
+
+class ConvergenceTracker:
+    """Stream per-iteration convergence of value iteration to disk with bounded memory."""
+
+    def __init__(
+        self,
+        filename: str,
+        states: list[tuple[int, int, int]] | None = None,
+        stride: int | None = None,
+    ):
+        """Initialise the tracker. Pass it to value_iteration, which starts and closes it.
+
+        Args:
+            filename (str): Filename of the binary tracker file (overwritten when the solve starts).
+            states (list[tuple[int, int, int]] | None, optional): States (i, j, k) whose values to
+                track. Defaults to None.
+            stride (int | None, optional): Track every stride-th state of the flattened value
+                function instead. Defaults to None (no values, only delta and wall time).
+
+        Raises:
+            ValueError: Only one of states and stride can be provided.
+        """
+        if states is not None and stride is not None:
+            raise ValueError("Only one of states and stride can be provided.")
+
+        self.filename = filename
+        self.states = states
+        self.stride = stride
+        self.iteration = 0
+        self._indices = None
+        self._file = None
+        self._start = None
+
+    def start(self, shape: tuple[int, ...], metadata: dict | None = None):
+        """Write the header and start the clock.
+
+        Args:
+            shape (tuple[int, ...]): Shape of the value function.
+            metadata (dict | None, optional): Extra JSON serialisable header entries. Defaults to None.
+        """
+        if self.states is not None:
+            self._indices = np.ravel_multi_index(np.array(self.states, dtype=int).T, shape)
+        elif self.stride is not None:
+            self._indices = np.arange(0, int(np.prod(shape)), self.stride)
+        else:
+            self._indices = np.zeros(0, dtype=int)
+
+        header = {
+            "shape": list(shape),
+            "indices": self._indices.tolist(),
+            **(metadata or {}),
+        }
+        encoded = json.dumps(header).encode()
+        encoded += b" " * (-(len(MAGIC) + 4 + len(encoded)) % 8)
+
+        os.makedirs(os.path.dirname(self.filename) or ".", exist_ok=True)
+        self._file = open(self.filename, "wb")
+        self._file.write(MAGIC + struct.pack("<I", len(encoded)) + encoded)
+
+        self.iteration = 0
+        self._start = time.perf_counter()
+
+    def record(self, delta: float, V: np.ndarray):
+        """Append the record of an iteration.
+
+        Args:
+            delta (float): Largest change of the values in the iteration.
+            V (np.ndarray): Value function after the iteration.
+        """
+        self.iteration += 1
+        record = np.empty(_FIELDS + len(self._indices))
+        record[:_FIELDS] = self.iteration, delta, time.perf_counter() - self._start
+        record[_FIELDS:] = V.ravel()[self._indices]
+
+        self._file.write(record.tobytes())
+        self._file.flush()
+
+    def close(self):
+        """Close the tracker file."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def load_convergence(filename: str) -> dict:
+    """Load the records of a convergence tracker file.
+
+    An incomplete last record (e.g. from an interrupted solve) is ignored.
+
+    Args:
+        filename (str): Filename of the binary tracker file.
+
+    Returns:
+        dict: Header entries, plus the "iteration", "delta" and "time" per record, the "values"
+            of shape (records, tracked states) and the tracked "states" as (i, j, k) rows.
+    """
+    with open(filename, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError("Not a convergence tracker file.")
+        (length,) = struct.unpack("<I", f.read(4))
+        header = json.loads(f.read(length))
+        data = np.fromfile(f, dtype=np.float64)
+
+    indices = np.array(header["indices"], dtype=int)
+    width = _FIELDS + len(indices)
+    records = data[: len(data) // width * width].reshape(-1, width)
+
+    return {
+        **header,
+        "iteration": records[:, 0].astype(int),
+        "delta": records[:, 1],
+        "time": records[:, 2],
+        "values": records[:, _FIELDS:],
+        "states": np.stack(np.unravel_index(indices, header["shape"]), axis=1),
+    }
+
+
+def plot_convergence(filename: str, max_states: int = 20):
+    """Plot the delta per iteration, and the values of the tracked states, of a tracker file.
+
+    Args:
+        filename (str): Filename of the binary tracker file.
+        max_states (int, optional): Largest number of tracked states to plot. Defaults to 20.
+
+    Returns:
+        matplotlib.figure.Figure: Figure of the convergence.
+    """
+    # Imported here so that solving does not require the plotting backend
+    import matplotlib.pyplot as plt
+
+    convergence = load_convergence(filename)
+    iterations = convergence["iteration"]
+
+    fig, (ax_delta, ax_values) = plt.subplots(1, 2, figsize=(12, 4))
+
+    ax_delta.semilogy(iterations, convergence["delta"])
+    ax_delta.set_xlabel("Iteration")
+    ax_delta.set_ylabel("Delta")
+    ax_delta.set_title("Largest change per iteration")
+
+    for state, values in zip(convergence["states"][:max_states], convergence["values"].T):
+        ax_values.plot(iterations, values, label=str(tuple(int(x) for x in state)))
+    ax_values.set_xlabel("Iteration")
+    ax_values.set_ylabel("Value")
+    ax_values.set_title("Values of tracked states")
+    if len(convergence["states"]):
+        ax_values.legend(fontsize="small")
+
+    fig.tight_layout()
+    return fig
@@ -0,0 +1,216 @@
+"""Module providing event hooks for PigGame.simulate, and aggregators of game statistics built on them."""
+
+import time
+from collections import Counter, defaultdict
+from typing import TYPE_CHECKING, Callable
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from pig_game import PigGame, PigPlayer
+
+# Events of a game, in the order they occur within a turn
+EVENTS = (
+    "on_game_start",
+    "on_turn_start",
+    "on_roll",
+    "on_bust",
+    "on_hold",
+    "on_turn_end",
+    "on_game_end",
+)
+
+
+class GameHook:
+    """Base class of the hooks attached to a PigGame, which are called as the game is played.
+
+    Subclasses override the events they observe. Only the overridden events are called, so a hook
+    that only counts turns does not slow down every roll.
+    """
+
+    def on_game_start(self, game: "PigGame") -> None:
+        """Called before the first turn of a game."""
+
+    def on_turn_start(self, game: "PigGame", player: "PigPlayer") -> None:
+        """Called before the first roll of a turn."""
+
+    def on_roll(self, game: "PigGame", player: "PigPlayer", roll_value: int | list[int]) -> None:
+        """Called after each roll, with the dice roll(s)."""
+
+    def on_bust(self, game: "PigGame", player: "PigPlayer", turn_total: int) -> None:
+        """Called when a roll of the jeopardy value ends the turn, with the turn total lost."""
+
+    def on_hold(self, game: "PigGame", player: "PigPlayer", turn_total: int) -> None:
+        """Called when the player holds, with the turn total banked."""
+
+    def on_turn_end(self, game: "PigGame", player: "PigPlayer") -> None:
+        """Called after a turn, once the player's score is updated."""
+
+    def on_game_end(self, game: "PigGame", winner: "PigPlayer") -> None:
+        """Called once a player reaches the target."""
+
+
+def bind_hooks(hooks: list[GameHook]) -> dict[str, list[Callable]]:
+    """Collect the bound methods of the hooks per event, leaving out events that are not overridden.
+
+    Args:
+        hooks (list[GameHook]): Hooks to bind.
+
+    Returns:
+        dict[str, list[Callable]]: Methods to call per event name (see EVENTS).
+    """
+    return {
+        event: [
+            getattr(hook, event)
+            for hook in hooks
+            if getattr(type(hook), event) is not getattr(GameHook, event)
+        ]
+        for event in EVENTS
+    }
+
+
+class RollRate(GameHook):
+    """Count the rolls and measure the rolls per second of the games played.
+
+    The time is measured from the start to the end of each game, with the hooks attached, so it
+    includes the cost of the instrumentation itself.
+    """
+
+    def __init__(self):
+        self.rolls = 0
+        self.seconds = 0.0
+        self._start = 0.0
+
+    def on_game_start(self, game: "PigGame") -> None:
+        self._start = time.perf_counter()
+
+    def on_roll(self, game: "PigGame", player: "PigPlayer", roll_value: int | list[int]) -> None:
+        self.rolls += 1
+
+    def on_game_end(self, game: "PigGame", winner: "PigPlayer") -> None:
+        self.seconds += time.perf_counter() - self._start
+
+    @property
+    def rolls_per_second(self) -> float:
+        """float: Rolls per second over all games, 0 before the first game ends."""
+        return self.rolls / self.seconds if self.seconds else 0.0
+
+
+class TurnsPerGame(GameHook):
+    """Record the number of turns of each game played."""
+
+    def __init__(self):
+        self.turns = []
+        self._turns = 0
+
+    def on_game_start(self, game: "PigGame") -> None:
+        self._turns = 0
+
+    def on_turn_end(self, game: "PigGame", player: "PigPlayer") -> None:
+        self._turns += 1
+
+    def on_game_end(self, game: "PigGame", winner: "PigPlayer") -> None:
+        self.turns.append(self._turns)
+
+    @property
+    def mean(self) -> float:
+        """float: Mean number of turns per game."""
+        return float(np.mean(self.turns)) if self.turns else 0.0
+
+
+class TurnTotalHistogram(GameHook):
+    """Count the points banked per turn, where a bust banks 0 points."""
+
+    def __init__(self):
+        self.counts = Counter()
+
+    def on_bust(self, game: "PigGame", player: "PigPlayer", turn_total: int) -> None:
+        self.counts[0] += 1
+
+    def on_hold(self, game: "PigGame", player: "PigPlayer", turn_total: int) -> None:
+        self.counts[turn_total] += 1
+
+    def histogram(self) -> np.ndarray:
+        """Return the histogram as an array.
+
+        Returns:
+            np.ndarray: Number of turns per points banked, indexed by the points banked.
+        """
+        histogram = np.zeros(max(self.counts, default=0) + 1, dtype=int)
+        for turn_total, count in self.counts.items():
+            histogram[turn_total] = count
+        return histogram
+
+
+class BustRate(GameHook):
+    """Count the turns and busts per strategy."""
+
+    def __init__(self):
+        self.turns = defaultdict(int)
+        self.busts = defaultdict(int)
+
+    def on_bust(self, game: "PigGame", player: "PigPlayer", turn_total: int) -> None:
+        self.busts[player.strategy] += 1
+
+    def on_turn_end(self, game: "PigGame", player: "PigPlayer") -> None:
+        self.turns[player.strategy] += 1
+
+    def rates(self) -> dict[str, float]:
+        """Return the bust rate per strategy.
+
+        Returns:
+            dict[str, float]: Proportion of the turns of each strategy that ended in a bust.
+        """
+        return {strategy: self.busts[strategy] / turns for strategy, turns in self.turns.items()}
+
+
+class GameStatistics(GameHook):
+    """All of the built-in aggregators (RollRate, TurnsPerGame, TurnTotalHistogram, BustRate) as one hook."""
+
+    def __init__(self):
+        self.roll_rate = RollRate()
+        self.turns_per_game = TurnsPerGame()
+        self.turn_totals = TurnTotalHistogram()
+        self.bust_rate = BustRate()
+        self._events = bind_hooks(
+            [self.roll_rate, self.turns_per_game, self.turn_totals, self.bust_rate]
+        )
+
+    def on_game_start(self, game: "PigGame") -> None:
+        for method in self._events["on_game_start"]:
+            method(game)
+
+    def on_roll(self, game: "PigGame", player: "PigPlayer", roll_value: int | list[int]) -> None:
+        for method in self._events["on_roll"]:
+            method(game, player, roll_value)
+
+    def on_bust(self, game: "PigGame", player: "PigPlayer", turn_total: int) -> None:
+        for method in self._events["on_bust"]:
+            method(game, player, turn_total)
+
+    def on_hold(self, game: "PigGame", player: "PigPlayer", turn_total: int) -> None:
+        for method in self._events["on_hold"]:
+            method(game, player, turn_total)
+
+    def on_turn_end(self, game: "PigGame", player: "PigPlayer") -> None:
+        for method in self._events["on_turn_end"]:
+            method(game, player)
+
+    def on_game_end(self, game: "PigGame", winner: "PigPlayer") -> None:
+        for method in self._events["on_game_end"]:
+            method(game, winner)
+
+    def summary(self) -> dict:
+        """Summarise the statistics of the games played.
+
+        Returns:
+            dict: The "games", "rolls_per_second", "mean_turns_per_game", "bust_rate" per strategy
+                and "turn_total_histogram" (see TurnTotalHistogram.histogram, as a list).
+        """
+        return {
+            "games": len(self.turns_per_game.turns),
+            "rolls_per_second": self.roll_rate.rolls_per_second,
+            "mean_turns_per_game": self.turns_per_game.mean,
+            "bust_rate": self.bust_rate.rates(),
+            "turn_total_histogram": self.turn_totals.histogram().tolist(),
+        }
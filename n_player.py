@@ -0,0 +1,212 @@
+"""Module providing an optimal solver for Pig with any number of players, and its policy for PigPlayer."""
+
+import numpy as np
+
+from value_iteration import roll_distribution
+
+
+class NPlayerPolicy:
+    """Optimal policy of N-player Pig, looked up from the scores of all players.
+
+    States are canonicalised by rotating the scores so that the player to move comes first, followed
+    by the opponents in turn order, so one table serves every seat. The roll decisions are stored as
+    bits, indexed [score, opponent scores in turn order..., turn total // 8].
+    """
+
+    __slots__ = ("goal", "number_players", "rolls")
+
+    def __init__(self, rolls: np.ndarray, goal: int, number_players: int):
+        """Initialise the policy.
+
+        Args:
+            rolls (np.ndarray): Packed roll decisions (see np.packbits) of shape
+                (goal,) * number_players + (ceil(goal / 8),).
+            goal (int): The number of points required to win.
+            number_players (int): Number of players.
+        """
+        self.rolls = rolls
+        self.goal = goal
+        self.number_players = number_players
+
+    def should_roll(self, score: int, opponent_scores: list[int], turn_total: int) -> bool:
+        """Determine whether the optimal action is to roll.
+
+        Args:
+            score (int): Score of the player to move.
+            opponent_scores (list[int]): Scores of the opponents in turn order, starting with the
+                next player to move.
+            turn_total (int): Turn total of the player to move.
+
+        Raises:
+            ValueError: The number of opponent scores does not match the number of players.
+
+        Returns:
+            bool: Whether to roll (hold outside the table).
+        """
+        if len(opponent_scores) != self.number_players - 1:
+            raise ValueError(f"Expected the scores of {self.number_players - 1} opponents.")
+
+        goal = self.goal
+        if score + turn_total >= goal or any(s >= goal for s in opponent_scores):
+            return False
+
+        byte = self.rolls.item(score, *opponent_scores, turn_total >> 3)
+        return bool(byte >> (7 - (turn_total & 7)) & 1)
+
+
+def solve_n_player(
+    number_players: int = 3,
+    goal: int = 50,
+    dice_sides: int = 6,
+    number_dice: int = 1,
+    epsilon: float = 1e-9,
+    max_iterations: int = 50,
+    print_terminal: bool = False,
+) -> tuple[np.ndarray, NPlayerPolicy, dict[str, int | float]]:
+    """Solve N-player Pig by policy iteration, each player maximising their own win probability.
+
+    The value of a state is the vector of the win probabilities of every player, relative to the
+    player to move (rotated as in NPlayerPolicy). Scores never decrease, so the turn start states are
+    solved in decreasing order of the banked total of all scores. Within a total, passing the turn
+    with nothing banked moves to the rotated state. Given the turn start values x, one backward pass
+    over the turn total gives every value of the total and the best actions, and the turn start
+    values of those actions are then solved exactly (see _evaluate_turn_starts), until x changes by
+    less than epsilon.
+
+    With three or more players the best actions within a total can cycle, each player's best action
+    changing with the others' (e.g. scores (7, 0, 7) and their rotations at goal 50), so that no
+    stationary policy is optimal for every player. After max_iterations the last policy is kept, with
+    its exact values, and the largest gain in win probability a player could make by changing action
+    is reported.
+
+    Opponent scores are kept in turn order rather than sorted, as the order decides who moves next
+    and so changes the win probabilities.
+
+    Args:
+        number_players (int, optional): Number of players. Defaults to 3.
+        goal (int, optional): The number of points required to win. Defaults to 50.
+        dice_sides (int, optional): Number of dice sides. Defaults to 6.
+        number_dice (int, optional): Number of dice per roll. Defaults to 1.
+        epsilon (float, optional): Convergence parameter. Defaults to 1e-9.
+        max_iterations (int, optional): Largest number of iterations per banked total. Defaults to 50.
+        print_terminal (bool, optional): Whether to print progress to terminal. Defaults to False.
+
+    Raises:
+        ValueError: Fewer than two players.
+
+    Returns:
+        tuple[np.ndarray, NPlayerPolicy, dict[str, int | float]]: Win probabilities of every player at
+            the start of a turn, of shape (goal,) * number_players + (number_players,) indexed
+            [score, opponent scores in turn order..., player relative to the player to move], the
+            optimal policy, and solver statistics ("iterations", "unconverged_states" and the largest
+            gain of changing action in those states, "max_gain").
+    """
+    if number_players < 2:
+        raise ValueError("At least two players are required.")
+
+    probabilities = roll_distribution(dice_sides, number_dice)
+    N = number_players
+
+    # Weighted stencil over the turn total of the successful roll outcomes
+    outcomes = np.flatnonzero(probabilities[1:]) + 1
+    weights = probabilities[outcomes]
+    offsets = outcomes[:, None] + np.arange(goal)  # offsets[r, k] = k + outcome r
+
+    # States as rows of scores, flattened so that the state rotated after banking k points from
+    # (s0, s1, ..., sN-1), which is (s1, ..., sN-1, s0 + k), has flat index goal * prefix + s0 + k
+    shape = (goal,) * N
+    states = np.indices(shape).reshape(N, -1).T
+    prefix = np.ravel_multi_index(tuple(states[:, 1:].T), shape[1:])
+    totals = states.sum(axis=1)
+    order = np.argsort(-totals, kind="stable")
+    bounds = np.searchsorted(-totals[order], np.arange(-totals.max(), 2))
+    position = np.empty(len(states), dtype=int)
+    position[order] = np.arange(len(states))
+
+    # Winning by reaching the goal is the unit vector of the player to move
+    win = np.zeros(N)
+    win[0] = 1
+
+    # Turn start values, padded so that banking at or past the goal reads as a win of the banker
+    values = np.zeros((len(states) + goal, N))
+    values[len(states) :, N - 1] = 1
+    rolls = np.zeros((len(states), (goal + 7) // 8), dtype=np.uint8)
+    stats = {"iterations": 0, "unconverged_states": 0, "max_gain": 0.0}
+
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        rows = order[start:end]
+        scores = states[rows, 0]
+        n = len(rows)
+        valid = scores[:, None] + np.arange(goal) < goal
+
+        # Banking k points passes the turn to the next player, one place along the value vector
+        banked = goal * prefix[rows, None] + scores[:, None] + np.arange(goal)
+        banked = np.where(valid, banked, len(states))
+        hold_val = np.roll(values[banked], 1, axis=-1)
+
+        # Passing with nothing banked stays within the total, at the rotated state
+        rotated = position[goal * prefix[rows] + scores] - start
+
+        padded = np.broadcast_to(win, (n, goal + len(probabilities), N)).copy()
+        slope = np.zeros((n, goal + len(probabilities)))  # derivative of the values w.r.t. passing
+        roll_val = np.zeros((n, goal, N))
+        x = values[rows]
+
+        iterations = 0
+        while True:
+            iterations += 1
+            passes = np.roll(x[rotated], 1, axis=-1)
+            hold_val[:, 0] = passes
+
+            for k in range(goal - 1, -1, -1):
+                roll_val[:, k] = probabilities[0] * passes + np.einsum(
+                    "r,nri->ni", weights, padded[:, offsets[:, k]]
+                )
+                roll_slope = probabilities[0] + slope[:, offsets[:, k]] @ weights
+                roll = roll_val[:, k, 0] > hold_val[:, k, 0]
+                padded[:, k] = np.where(
+                    valid[:, k, None], np.where(roll[:, None], roll_val[:, k], hold_val[:, k]), win
+                )
+                slope[:, k] = np.where(valid[:, k], np.where(roll, roll_slope, float(k == 0)), 0.0)
+
+            change = np.abs(padded[:, 0] - x).max(axis=1)
+            if change.max() < epsilon:
+                break
+
+            # The turn start values are linear in the value of passing for fixed actions
+            constant = padded[:, 0] - slope[:, 0, None] * passes
+            x = _evaluate_turn_starts(slope[:, 0], constant, rotated)
+
+            if iterations == max_iterations:
+                stats["unconverged_states"] += int((change >= epsilon).sum())
+                stats["max_gain"] = max(stats["max_gain"], float(change.max()))
+                break
+
+        values[rows] = x
+        rolls[rows] = np.packbits(valid & (roll_val[:, :, 0] > hold_val[:, :, 0]), axis=1)
+        stats["iterations"] += iterations
+
+        if print_terminal:
+            print(f"Total {totals[rows[0]]}: {iterations} iterations")
+
+    policy = NPlayerPolicy(rolls.reshape(shape + (-1,)), goal, N)
+    return values[: len(states)].reshape(shape + (N,)), policy, stats
+
+
+def _evaluate_turn_starts(
+    coefficient: np.ndarray, constant: np.ndarray, rotated: np.ndarray
+) -> np.ndarray:
+    """Solve x[s] = coefficient[s] * roll(x[rotated[s]], 1) + constant[s] for the turn start values.
+
+    Substituting the equation into itself doubles the number of passed turns that it spans, to
+    x[s] = a[s] * roll(x[q[s]], m) + b[s], so a vanishes after a few dozen substitutions.
+    """
+    a, b, q, m = coefficient.copy(), constant.copy(), rotated.copy(), 1
+    for _ in range(64):
+        if a.max() < 1e-17:
+            break
+        b = b + a[:, None] * np.roll(b[q], m, axis=-1)
+        a = a * a[q]
+        q = q[q]
+        m *= 2
+    return b
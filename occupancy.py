@@ -0,0 +1,153 @@
+"""Module computing the occupancy and reachability of every state of a Pig game with a forward pass over the score layers."""
+
+import numpy as np
+
+from pig_game import PigPlayer
+from policy_evaluation import turn_outcomes
+from simulation import hold_rule
+from value_iteration import layer_scores, roll_distribution, state_mask
+
+
+def turn_visits(player: PigPlayer, goal: int = 100) -> np.ndarray:
+    """Compute the expected number of visits to each turn total in a turn, for every pair of scores.
+
+    The turn is followed roll by roll from turn total 0, applying the player's strategy after each
+    successful roll as PigPlayer.action does. The turn total increases with every successful roll,
+    so each turn total is visited at most once per turn and the pass ends once every turn has
+    failed, held or reached the goal.
+
+    Args:
+        player (PigPlayer): Player whose strategy, dice and policy to use.
+        goal (int, optional): The number of points required to win. Defaults to 100.
+
+    Returns:
+        np.ndarray: Probability of visiting each state in a turn started with turn total 0, of shape
+            (goal, goal, goal) indexed [score, opponent score, turn total].
+    """
+    rule = hold_rule(player)
+    probabilities = roll_distribution(player.dice_sides, player.number_dice)
+    outcomes = np.flatnonzero(probabilities[1:]) + 1
+    mask = state_mask(goal)
+
+    i = np.arange(goal)[:, None, None]
+    j = np.arange(goal)[None, :, None]
+    k = np.arange(goal)[None, None, :]
+
+    # Probability of being mid-turn at each turn total, starting from turn total 0
+    mass = np.zeros((goal, goal, goal))
+    mass[:, :, 0] = 1
+    visits = mass.copy()
+
+    rolls = 0
+    while mass.any():
+        rolls += 1
+
+        # Turn totals reaching the goal leave the non-terminal states
+        rolled = np.zeros_like(mass)
+        for r in outcomes[outcomes < goal]:
+            rolled[:, :, r:] += probabilities[r] * mass[:, :, :-r]
+        rolled = np.where(mask, rolled, 0)
+        visits += rolled
+
+        # Apply the strategy after the successful roll
+        hold = np.broadcast_to(rule(i, j, k, rolls), rolled.shape)
+        mass = np.where(hold, 0, rolled)
+
+    return visits
+
+
+def state_occupancy(
+    player_1: PigPlayer,
+    player_2: PigPlayer,
+    goal: int = 100,
+    start: tuple[int, int] = (0, 0),
+) -> tuple[np.ndarray, np.ndarray]:
+    """Compute the expected number of visits to every state of a game between two fixed strategies.
+
+    Scores never decrease, so the turn starts are propagated forward in increasing order of the
+    banked total i + j. Within a total, a failed turn only swaps the player to move, so each turn
+    start and its swapped turn start form a 2 x 2 linear system that is solved exactly. The visits
+    within a turn then follow from turn_visits.
+
+    A state can be visited more than once (e.g. (0, 0, 0) after both players fail their first turn),
+    so the occupancy is the expected number of visits rather than the probability of a visit. Both
+    are positive for exactly the reachable states, see reachability.
+
+    Args:
+        player_1 (PigPlayer): Starting player, whose strategy, dice and policy to use.
+        player_2 (PigPlayer): Second player, whose strategy, dice and policy to use.
+        goal (int, optional): The number of points required to win. Defaults to 100.
+        start (tuple[int, int], optional): Scores of player 1 and player 2 at the start of the game.
+            Defaults to (0, 0).
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Expected visits to the states where player 1 is to move, and
+            to the states where player 2 is to move, both of shape (goal, goal, goal) indexed
+            [score of player to move, score of the other player, turn total].
+    """
+    failure_1, banked_1 = turn_outcomes(player_1, goal=goal)
+    failure_2, banked_2 = turn_outcomes(player_2, goal=goal)
+
+    # Expected number of turns started at each pair of scores, indexed [mover score, other score]
+    T_1 = np.zeros((goal, goal))
+    T_2 = np.zeros((goal, goal))
+    T_1[start] = 1
+
+    for total in range(sum(start), 2 * goal - 1):
+        scores = layer_scores(total, goal)
+        opponent_scores = total - scores
+
+        # Solve x = u + b y, y = v + a x for x = T_1[i, j], y = T_2[j, i] given the incoming turns u, v
+        u = T_1[scores, opponent_scores]
+        v = T_2[opponent_scores, scores]
+        a = failure_1[scores, opponent_scores]
+        b = failure_2[opponent_scores, scores]
+        x = (u + b * v) / (1 - a * b)
+        y = v + a * x
+        T_1[scores, opponent_scores] = x
+        T_2[opponent_scores, scores] = y
+
+        # Banking a positive turn total moves to a higher total (banking past the goal ends the game)
+        _push_banked(T_2, x, banked_1, scores, opponent_scores, goal)
+        _push_banked(T_1, y, banked_2, opponent_scores, scores, goal)
+
+    occupancy_1 = T_1[:, :, None] * turn_visits(player_1, goal=goal)
+    occupancy_2 = T_2[:, :, None] * turn_visits(player_2, goal=goal)
+    return occupancy_1, occupancy_2
+
+
+def reachability(occupancy: np.ndarray, opponent_score: int | None = None) -> np.ndarray:
+    """Mark the states with a positive occupancy as reachable.
+
+    Args:
+        occupancy (np.ndarray): Expected visits of shape (goal, goal, goal) from state_occupancy.
+        opponent_score (int | None, optional): Opponent's score of the cross section to return.
+            Defaults to None (all states).
+
+    Returns:
+        np.ndarray: 1 for reachable and 0 for unreachable states, of shape (goal, goal, goal), or
+            of shape (goal, goal) indexed [score, turn total] for a cross section.
+    """
+    reachable = (occupancy > 0).astype(np.int8)
+    if opponent_score is None:
+        return reachable
+    return reachable[:, opponent_score, :]
+
+
+def _push_banked(
+    T_next: np.ndarray,
+    turns: np.ndarray,
+    banked: np.ndarray,
+    scores: np.ndarray,
+    opponent_scores: np.ndarray,
+    goal: int,
+):
+    """Add the turns of the next player started after banking a positive total from a layer."""
+    totals = np.arange(1, banked.shape[2])
+    next_scores = scores[:, None] + totals
+    inside = next_scores < goal
+    rows = np.broadcast_to(opponent_scores[:, None], next_scores.shape)
+
+    # Every (opponent score, next score) pair appears once, as the layer scores are distinct
+    flow = turns[:, None] * banked[scores, opponent_scores][:, 1:]
+    T_next[rows[inside], next_scores[inside]] += flow[inside]
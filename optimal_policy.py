@@ -1,62 +1,236 @@
 """Module proving code to extract the optimal policy for a pig game given a value function."""
 
+import numpy as np
+
+from value_iteration import (
+    compute_action_values,
+    state_mask,
+    value_function_from_dict,
+)
+from value_store import dequantize, quantize
+
+
+def roll_decisions(
+    V: dict[tuple[int, int, int], float] | np.ndarray,
+    goal: int = 100,
+    dice_sides: int = 6,
+    number_dice: int = 1,
+    probabilities: np.ndarray | None = None,
+) -> np.ndarray:
+    """Given a value function, determine in which states the optimal action is to roll.
+
+    Args:
+        V (dict[tuple[int, int, int], float] | np.ndarray): Value function for all states, as a
+            dictionary or a dense (goal, goal, goal) array.
+            - States are the form (current player's score, opponent's score, turn total).
+        goal (int, optional): The number of points required to win. Defaults to 100.
+        dice_sides (int, optional): Number of dice sides. Defaults to 6.
+        number_dice (int, optional): Number of dice per roll. Defaults to 1.
+        probabilities (np.ndarray | None, optional): Distribution of the outcome of a roll,
+            replacing the dice (see value_iteration). Defaults to None.
+
+    Returns:
+        np.ndarray: Boolean array of shape (goal, goal, goal), True where rolling is optimal.
+    """
+    if not isinstance(V, np.ndarray):
+        V = value_function_from_dict(V, goal)
+
+    roll_val, hold_val = compute_action_values(
+        V,
+        goal=goal,
+        dice_sides=dice_sides,
+        number_dice=number_dice,
+        probabilities=probabilities,
+    )
+    return (roll_val > hold_val) & state_mask(goal)
+
 
 def extract_optimal_policy(
-    V: dict[tuple[int, int, int], float],
+    V: dict[tuple[int, int, int], float] | np.ndarray,
     goal: int = 100,
     dice_sides: int = 6,
-) -> dict[tuple[int, int, int], float]:
+    number_dice: int = 1,
+    probabilities: np.ndarray | None = None,
+) -> dict[tuple[int, int, int], str]:
     """Given a value function, determine the optimal policy for the game of Pig.
 
+    The policy is returned in full dictionary form. See extract_policy_table for the compact form.
+
     Args:
-        V (dict[tuple[int, int, int], float]): Value function for all states.
+        V (dict[tuple[int, int, int], float] | np.ndarray): Value function for all states, as a
+            dictionary or a dense (goal, goal, goal) array.
             - States are the form (current player's score, opponent's score, turn total).
         goal (int, optional): The number of points required to win. Defaults to 100.
         dice_sides (int, optional): Number of dice sides. Defaults to 6.
+        number_dice (int, optional): Number of dice per roll. Defaults to 1.
+        probabilities (np.ndarray | None, optional): Distribution of the outcome of a roll,
+            replacing the dice (see value_iteration). Defaults to None.
 
     Returns:
-        dict[tuple[int, int, int], float]: Optimal action policy per state.
+        dict[tuple[int, int, int], str]: Optimal action policy per state.
     """
+    rolls = roll_decisions(
+        V,
+        goal=goal,
+        dice_sides=dice_sides,
+        number_dice=number_dice,
+        probabilities=probabilities,
+    )
+
     # Extract states
-    states = list(V.keys())
-
-    # Policy storage
-    policy = {}
-
-    for s in states:
-        i, j, k = s
-
-        # Already won - hold position.
-        if i + k >= goal:
-            policy[s] = "hold"
-            continue
-
-        # Compute value of action "roll"
-        if i + k + dice_sides >= goal:
-            r_star = goal - i - k
-
-            if r_star <= 2:
-                num_winning_rolls = dice_sides - 1
-                roll_val = (1 / dice_sides) * ((1 - V[(j, i, 0)]) + num_winning_rolls)
-            else:
-                roll_val = (1 / dice_sides) * (
-                    (1 - V[(j, i, 0)])
-                    + sum(V[(i, j, k + r)] for r in range(2, r_star))
-                    + (dice_sides - r_star + 1)
-                )
-        else:
-            roll_val = (1 / dice_sides) * (
-                (1 - V[(j, i, 0)])
-                + sum(V[(i, j, k + r)] for r in range(2, dice_sides + 1))
-            )
-
-        # Compute value of action "hold"
-        hold_val = 1 - V[(j, i + k, 0)]
-
-        # Determine optimal action
-        if roll_val > hold_val:
-            policy[s] = "roll"
-        else:
-            policy[s] = "hold"
-
-    return policy
+    if isinstance(V, np.ndarray):
+        states = [(i, j, k) for i in range(goal) for j in range(goal) for k in range(goal - i)]
+    else:
+        states = list(V.keys())
+
+    # Already won states hold position
+    return {
+        s: "roll" if s[0] + s[2] < goal and rolls[s] else "hold" for s in states
+    }
+
+
+def extract_policy_table(
+    V: dict[tuple[int, int, int], float] | np.ndarray,
+    goal: int = 100,
+    dice_sides: int = 6,
+    number_dice: int = 1,
+    probabilities: np.ndarray | None = None,
+) -> np.ndarray:
+    """Given a value function, determine the optimal policy as a table of hold thresholds.
+
+    For a fixed (i, j) the optimal policy is to roll while the turn total k < t(i, j) and hold
+    otherwise, so the policy is stored as a (goal, goal) integer table t. See
+    find_non_monotone_states for the states where this form is not exact.
+
+    Args:
+        V (dict[tuple[int, int, int], float] | np.ndarray): Value function for all states, as a
+            dictionary or a dense (goal, goal, goal) array.
+        goal (int, optional): The number of points required to win. Defaults to 100.
+        dice_sides (int, optional): Number of dice sides. Defaults to 6.
+        number_dice (int, optional): Number of dice per roll. Defaults to 1.
+        probabilities (np.ndarray | None, optional): Distribution of the outcome of a roll,
+            replacing the dice (see value_iteration). Defaults to None.
+
+    Returns:
+        np.ndarray: Hold threshold table of shape (goal, goal), indexed [i, j].
+    """
+    rolls = roll_decisions(
+        V,
+        goal=goal,
+        dice_sides=dice_sides,
+        number_dice=number_dice,
+        probabilities=probabilities,
+    )
+
+    # The threshold is the first turn total at which holding is optimal
+    first_hold = np.argmin(rolls, axis=2)
+    never_hold = rolls.all(axis=2)
+    table = np.where(never_hold, goal, first_hold)
+
+    dtype = np.int16 if goal < np.iinfo(np.int16).max else np.int32
+    return table.astype(dtype)
+
+
+def find_non_monotone_states(
+    V: dict[tuple[int, int, int], float] | np.ndarray,
+    goal: int = 100,
+    dice_sides: int = 6,
+    number_dice: int = 1,
+    probabilities: np.ndarray | None = None,
+) -> list[tuple[int, int]]:
+    """Find the (i, j) where the optimal policy is not of the form roll while k < t(i, j).
+
+    Args:
+        V (dict[tuple[int, int, int], float] | np.ndarray): Value function for all states, as a
+            dictionary or a dense (goal, goal, goal) array.
+        goal (int, optional): The number of points required to win. Defaults to 100.
+        dice_sides (int, optional): Number of dice sides. Defaults to 6.
+        number_dice (int, optional): Number of dice per roll. Defaults to 1.
+        probabilities (np.ndarray | None, optional): Distribution of the outcome of a roll,
+            replacing the dice (see value_iteration). Defaults to None.
+
+    Returns:
+        list[tuple[int, int]]: Scores (i, j) where rolling is optimal again after a hold.
+    """
+    rolls = roll_decisions(
+        V,
+        goal=goal,
+        dice_sides=dice_sides,
+        number_dice=number_dice,
+        probabilities=probabilities,
+    )
+    table = extract_policy_table(
+        V,
+        goal=goal,
+        dice_sides=dice_sides,
+        number_dice=number_dice,
+        probabilities=probabilities,
+    )
+
+    k = np.arange(goal)[None, None, :]
+    late_rolls = (rolls & (k >= table[:, :, None])).any(axis=2)
+    return [(int(i), int(j)) for i, j in zip(*np.nonzero(late_rolls))]
+
+
+def policy_table_to_dict(table: np.ndarray) -> dict[tuple[int, int, int], str]:
+    """Expand a hold threshold table to the full dictionary form of the policy.
+
+    Args:
+        table (np.ndarray): Hold threshold table of shape (goal, goal).
+
+    Returns:
+        dict[tuple[int, int, int], str]: Action policy per state.
+    """
+    goal = table.shape[0]
+    return {
+        (i, j, k): "roll" if k < table[i, j] else "hold"
+        for i in range(goal)
+        for j in range(goal)
+        for k in range(goal - i)
+    }
+
+
+def precision_report(
+    V: np.ndarray,
+    precision: str,
+    goal: int = 100,
+    dice_sides: int = 6,
+    number_dice: int = 1,
+    probabilities: np.ndarray | None = None,
+) -> dict[str, str | int | float]:
+    """Report what storing a value function at a reduced precision gives up.
+
+    Args:
+        V (np.ndarray): Dense value function of shape (goal, goal, goal), at full precision.
+        precision (str): Storage precision, see value_store.quantize.
+        goal (int, optional): The number of points required to win. Defaults to 100.
+        dice_sides (int, optional): Number of dice sides. Defaults to 6.
+        number_dice (int, optional): Number of dice per roll. Defaults to 1.
+        probabilities (np.ndarray | None, optional): Distribution of the outcome of a roll,
+            replacing the dice (see value_iteration). Defaults to None.
+
+    Returns:
+        dict[str, str | int | float]: The "precision", "bytes_per_value", "max_error" (largest
+            absolute error of the value of a state) and "policy_flips" (number of states where the
+            roll/hold decision of extract_optimal_policy changes).
+    """
+    stored = quantize(V, precision)
+    reduced = dequantize(stored, precision)
+
+    mask = state_mask(goal)
+    error = np.abs(reduced.astype(np.float64) - V)
+    decisions = {
+        "dice_sides": dice_sides,
+        "number_dice": number_dice,
+        "probabilities": probabilities,
+    }
+    flips = roll_decisions(V, goal=goal, **decisions) != roll_decisions(
+        reduced, goal=goal, **decisions
+    )
+
+    return {
+        "precision": precision,
+        "bytes_per_value": stored.itemsize,
+        "max_error": float(error[mask].max()),
+        "policy_flips": int(flips.sum()),
+    }
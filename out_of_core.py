@@ -0,0 +1,212 @@
+"""Module providing an out-of-core layered solver for large goals, keeping the value arrays in memory-mapped files on disk."""
+
+import json
+import os
+
+import numpy as np
+
+from value_iteration import (
+    SOLVER_VERSION,
+    layer_scores,
+    roll_distribution,
+    solve_layer,
+)
+from value_store import create_value_array, load_value_array
+
+PROGRESS = "progress.json"
+ARRAYS = {"V": "value.bin", "roll": "roll.bin", "hold": "hold.bin"}
+TURN_START = "turn_start.bin"
+
+# Rough number of float64 working arrays per row of a layer block within solve_layer
+_ARRAYS_PER_ROW = 12
+
+
+def solve_out_of_core(
+    directory: str,
+    goal: int = 1000,
+    dice_sides: int = 6,
+    epsilon: float = 1e-6,
+    number_dice: int = 1,
+    probabilities: np.ndarray | None = None,
+    memory_budget: int = 2**28,
+    action_values: bool = True,
+    print_terminal: bool = False,
+) -> tuple[np.memmap, np.memmap | None, np.memmap | None, dict[str, int | list[int]]]:
+    """Solve Pig layer by layer (see value_iteration), with the value arrays on disk.
+
+    Each layer of banked total i + j is solved in blocks of (i, j), (j, i) pairs sized to the
+    memory budget, and written to the memory-mapped arrays, so that only a block and the turn start
+    values (a further goal x goal array on disk) are resident. The last completed layer is recorded
+    in a progress file after its values are flushed, so an interrupted solve resumes from there.
+
+    Args:
+        directory (str): Directory of the value arrays and progress file.
+        goal (int, optional): The number of points required to win. Defaults to 1000.
+        dice_sides (int, optional): Number of dice sides. Defaults to 6.
+        epsilon (float, optional): Convergence parameter. Defaults to 1e-6.
+        number_dice (int, optional): Number of dice per roll. Defaults to 1.
+        probabilities (np.ndarray | None, optional): Distribution of the outcome of a roll,
+            replacing the dice (see value_iteration). Defaults to None.
+        memory_budget (int, optional): Bytes of working memory for a block of a layer. Defaults to 2**28.
+        action_values (bool, optional): Whether to also store the value of rolling and holding,
+            tripling the disk space. Defaults to True.
+        print_terminal (bool, optional): Whether to print progress to terminal. Defaults to False.
+
+    Raises:
+        ValueError: The directory holds the progress of a different solve.
+
+    Returns:
+        tuple[np.memmap, np.memmap | None, np.memmap | None, dict[str, int | list[int]]]: Value
+            function, value of rolling and value of holding (read-only memory maps of shape
+            (goal, goal, goal), the action values None unless stored) and solver statistics.
+    """
+    if probabilities is None:
+        probabilities = roll_distribution(dice_sides, number_dice)
+
+    names = ["V", "roll", "hold"] if action_values else ["V"]
+    solve_key = {
+        "goal": goal,
+        "epsilon": epsilon,
+        "probabilities": probabilities.tolist(),
+        "arrays": names,
+        "solver_version": SOLVER_VERSION,
+    }
+    progress_filename = os.path.join(directory, PROGRESS)
+
+    if os.path.exists(progress_filename):
+        with open(progress_filename, "r") as f:
+            progress = json.load(f)
+        if any(progress.get(key) != value for key, value in solve_key.items()):
+            raise ValueError(f"{directory} holds the progress of a different solve.")
+        arrays = {name: _open(directory, ARRAYS[name]) for name in names}
+        turn_start = _open(directory, TURN_START)
+        if print_terminal:
+            print(f"Resuming below layer {progress['layer']}")
+    else:
+        header = {
+            "goal": goal,
+            "dice_sides": dice_sides,
+            "epsilon": epsilon,
+            "number_dice": number_dice,
+            "solver_version": SOLVER_VERSION,
+        }
+        arrays = {
+            name: create_value_array(
+                os.path.join(directory, ARRAYS[name]), (goal, goal, goal), **header
+            )
+            for name in names
+        }
+        turn_start = create_value_array(
+            os.path.join(directory, TURN_START), (goal, goal), **header
+        )
+        progress = {
+            **solve_key,
+            "layer": 2 * goal - 1,
+            "layer_iterations": [0] * (2 * goal - 1),
+            "backups": 0,
+        }
+
+    # Blocks are sized so that the working arrays of solve_layer fit in the memory budget
+    row_bytes = _ARRAYS_PER_ROW * 8 * (goal + len(probabilities))
+    pairs_per_block = max(1, memory_budget // (2 * row_bytes))
+
+    for total in range(progress["layer"] - 1, -1, -1):
+        scores = layer_scores(total, goal)
+        opponent_scores = total - scores
+
+        iterations = 0
+        for block in layer_blocks(len(scores), pairs_per_block):
+            block_scores = scores[block]
+            block_opponents = opponent_scores[block]
+
+            values, roll_val, hold_val, block_iterations = solve_layer(
+                values=np.zeros((len(block), goal)),
+                hold_fixed=_hold_values(turn_start, block_scores, block_opponents, goal),
+                scores=block_scores,
+                goal=goal,
+                probabilities=probabilities,
+                epsilon=epsilon,
+            )
+            arrays["V"][block_scores, block_opponents] = values
+            if action_values:
+                arrays["roll"][block_scores, block_opponents] = roll_val
+                arrays["hold"][block_scores, block_opponents] = hold_val
+            turn_start[block_scores, block_opponents] = values[:, 0]
+
+            iterations = max(iterations, block_iterations)
+            valid = block_scores[:, None] + np.arange(goal) < goal
+            progress["backups"] += block_iterations * int(valid.sum())
+
+        # Values reach the disk before the layer is recorded as complete
+        for array in [*arrays.values(), turn_start]:
+            array.flush()
+        progress["layer"] = total
+        progress["layer_iterations"][total] = iterations
+        _store_progress(progress_filename, progress)
+
+        if print_terminal:
+            print(f"Layer {total}: {iterations} iterations")
+
+    stats = {
+        "iterations": sum(progress["layer_iterations"]),
+        "backups": progress["backups"],
+        "layer_iterations": progress["layer_iterations"],
+    }
+    V, V_roll, V_hold = (
+        _open(directory, ARRAYS[name], mode="r") if name in names else None
+        for name in ["V", "roll", "hold"]
+    )
+    return V, V_roll, V_hold, stats
+
+
+def layer_blocks(n: int, pairs: int) -> list[np.ndarray]:
+    """Split the rows of a layer into blocks of whole (i, j), (j, i) pairs.
+
+    The rows of a layer are in order of increasing i, so row r pairs with row n - 1 - r (see
+    solve_layer). A block holds rows a, ..., b - 1 and their mirror rows in increasing order, so
+    the rows of a block also pair by reversal.
+
+    Args:
+        n (int): Number of rows of the layer.
+        pairs (int): Largest number of pairs per block.
+
+    Returns:
+        list[np.ndarray]: Row indices of each block.
+    """
+    half = n // 2
+    blocks = []
+    for a in range(0, half, pairs):
+        b = min(a + pairs, half)
+        middle = [half] if n % 2 and b == half else []
+        blocks.append(np.concatenate([np.arange(a, b), middle, np.arange(n - b, n - a)]).astype(int))
+
+    # A single row pairs with itself (i = j)
+    if n % 2 and half == 0:
+        blocks.append(np.array([0]))
+    return blocks
+
+
+def _hold_values(
+    turn_start: np.ndarray, scores: np.ndarray, opponent_scores: np.ndarray, goal: int
+) -> np.ndarray:
+    """Return the value of holding for a block of a layer (see layer_hold_values), row by row."""
+    hold = np.zeros((len(scores), goal))
+    for row, (i, j) in enumerate(zip(scores, opponent_scores)):
+        # Holding at or beyond the goal reads as a win
+        inside = goal - i
+        hold[row, :inside] = 1 - turn_start[j, i:]
+        hold[row, inside:] = 1
+    return hold
+
+
+def _open(directory: str, name: str, mode: str = "r+") -> np.memmap:
+    """Memory-map an array of an out-of-core solve."""
+    array, _ = load_value_array(os.path.join(directory, name), mode=mode)
+    return array
+
+
+def _store_progress(filename: str, progress: dict):
+    """Store the progress, replacing the previous one only once it is completely written."""
+    with open(filename + ".tmp", "w") as f:
+        json.dump(progress, f)
+    os.replace(filename + ".tmp", filename)
@@ -0,0 +1,265 @@
+"""Module providing a parallel runner that solves a grid of Pig and Piglet configurations, writing an artifact per configuration and a manifest."""
+
+import argparse
+import json
+import os
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import product
+
+from optimal_policy import extract_policy_table
+from solver import GAMES, cache_filename, game_probabilities, is_valid_solution, solve
+from value_iteration import SOLVER_VERSION
+from value_store import (
+    BINARY_EXTENSION,
+    load_value_array,
+    read_value_header,
+    store_value_array,
+)
+
+SWEEP_DIRECTORY = "data/value_function/sweep"
+MANIFEST = "manifest.json"
+
+
+def parameter_grid(
+    games: tuple[str, ...] = ("pig",),
+    goals: tuple[int, ...] = (100,),
+    dice_sides: tuple[int, ...] = (6,),
+    number_dice: tuple[int, ...] = (1,),
+    epsilon: float = 1e-6,
+) -> list[dict]:
+    """Build the configurations of a parameter grid.
+
+    Args:
+        games (tuple[str, ...], optional): Games to solve, "pig" and/or "piglet". Defaults to ("pig",).
+        goals (tuple[int, ...], optional): Goals to solve. Defaults to (100,).
+        dice_sides (tuple[int, ...], optional): Numbers of dice sides (Pig only). Defaults to (6,).
+        number_dice (tuple[int, ...], optional): Numbers of dice per roll (Pig only). Defaults to (1,).
+        epsilon (float, optional): Convergence parameter. Defaults to 1e-6.
+
+    Returns:
+        list[dict]: Distinct configurations, as keyword arguments of solver.solve.
+    """
+    configs = []
+    for game, goal, sides, dice in product(games, goals, dice_sides, number_dice):
+        # Piglet has no dice, so only the default dice are kept
+        if game == "piglet":
+            sides, dice = 6, 1
+        config = {
+            "game": game,
+            "goal": goal,
+            "dice_sides": sides,
+            "number_dice": dice,
+            "epsilon": epsilon,
+        }
+        if config not in configs:
+            configs.append(config)
+    return configs
+
+
+def artifact_filenames(config: dict, directory: str = SWEEP_DIRECTORY) -> tuple[str, str]:
+    """Return the artifact filenames of a configuration.
+
+    Args:
+        config (dict): Configuration from parameter_grid.
+        directory (str, optional): Sweep directory. Defaults to SWEEP_DIRECTORY.
+
+    Returns:
+        tuple[str, str]: Filename of the solution (value function, value of rolling and value of
+            holding), and filename of the hold threshold table of the optimal policy.
+    """
+    solution = cache_filename(directory=directory, **config)
+    policy = solution[: -len(BINARY_EXTENSION)] + "_policy" + BINARY_EXTENSION
+    return solution, policy
+
+
+def is_valid_artifact(config: dict, directory: str = SWEEP_DIRECTORY) -> bool:
+    """Determine whether the artifacts of a configuration exist, are complete and are up to date.
+
+    Args:
+        config (dict): Configuration from parameter_grid.
+        directory (str, optional): Sweep directory. Defaults to SWEEP_DIRECTORY.
+
+    Returns:
+        bool: Whether the configuration can be skipped.
+    """
+    solution, policy = artifact_filenames(config, directory)
+    if not is_valid_solution(solution, {**config, "solver_version": SOLVER_VERSION}):
+        return False
+    try:
+        header = read_value_header(policy)
+    except (ValueError, OSError):
+        return False
+    return header.get("solver_version") == SOLVER_VERSION and header.get("shape") == [
+        config["goal"],
+        config["goal"],
+    ]
+
+
+def run_sweep(
+    configs: list[dict],
+    directory: str = SWEEP_DIRECTORY,
+    workers: int | None = None,
+    method: str = "layered",
+    print_terminal: bool = True,
+) -> list[dict]:
+    """Solve every configuration across a process pool, skipping those with valid artifacts.
+
+    The solves are independent, so they are scheduled largest goal first to reduce the time that
+    workers stand idle at the end of the sweep. Each job runs in a fresh worker process, so that its
+    peak resident memory is measured on its own, above the memory the worker inherited from this
+    process. The manifest is rewritten as each job completes.
+
+    Args:
+        configs (list[dict]): Configurations from parameter_grid.
+        directory (str, optional): Sweep directory for the artifacts and manifest. Defaults to SWEEP_DIRECTORY.
+        workers (int | None, optional): Number of worker processes. Defaults to None (one per CPU).
+        method (str, optional): Solver method, see value_iteration. Defaults to "layered".
+        print_terminal (bool, optional): Whether to print progress to terminal. Defaults to True.
+
+    Returns:
+        list[dict]: Manifest entries per configuration, with the artifact filenames, the "status"
+            ("solved" or "skipped"), the "seconds" and "peak_memory" (peak resident memory of the
+            job in bytes, above the resident memory of the worker when the job started) of solved
+            jobs and the probability that the starting player wins.
+    """
+    manifest = []
+    pending = []
+    for config in sorted(configs, key=lambda c: (c["goal"], c["number_dice"]), reverse=True):
+        if is_valid_artifact(config, directory):
+            solution, policy = artifact_filenames(config, directory)
+            manifest.append(
+                {
+                    "config": config,
+                    "solution": solution,
+                    "policy": policy,
+                    "status": "skipped",
+                    "win_probability": float(load_value_array(solution)[0][0, 0, 0, 0]),
+                }
+            )
+        else:
+            pending.append(config)
+
+    if print_terminal:
+        print(f"{len(pending)} configurations to solve, {len(manifest)} skipped")
+
+    with ProcessPoolExecutor(max_workers=workers, max_tasks_per_child=1) as executor:
+        futures = [executor.submit(_solve_job, config, directory, method) for config in pending]
+        for future in as_completed(futures):
+            entry = future.result()
+            manifest.append(entry)
+            _store_manifest(manifest, directory)
+            if print_terminal:
+                print(
+                    f"{entry['config']}: {entry['seconds']:.2f} s, "
+                    f"peak memory {entry['peak_memory'] / 2**20:.1f} MiB"
+                )
+
+    _store_manifest(manifest, directory)
+    return manifest
+
+
+def load_manifest(directory: str = SWEEP_DIRECTORY) -> list[dict]:
+    """Load the manifest of a sweep.
+
+    Args:
+        directory (str, optional): Sweep directory. Defaults to SWEEP_DIRECTORY.
+
+    Returns:
+        list[dict]: Manifest entries, see run_sweep.
+    """
+    with open(os.path.join(directory, MANIFEST), "r") as f:
+        return json.load(f)
+
+
+def _peak_resident_memory() -> int:
+    """Return the peak resident memory of this process so far, in bytes."""
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != "darwin":
+        peak_memory *= 1024
+    return peak_memory
+
+
+def _solve_job(config: dict, directory: str, method: str) -> dict:
+    """Solve a configuration in a worker process and store its artifacts."""
+    solution, policy = artifact_filenames(config, directory)
+
+    # A forked worker starts with the resident memory of the parent, which is not the job's
+    baseline = _peak_resident_memory()
+    start = time.perf_counter()
+
+    V, _, _ = solve(**config, method=method, directory=directory, warm_start=False)
+    table = extract_policy_table(
+        V,
+        goal=config["goal"],
+        probabilities=game_probabilities(
+            config["game"], config["dice_sides"], config["number_dice"]
+        ),
+    )
+
+    seconds = time.perf_counter() - start
+
+    peak_memory = _peak_resident_memory() - baseline
+
+    store_value_array(
+        policy,
+        table,
+        goal=config["goal"],
+        dice_sides=config["dice_sides"],
+        epsilon=config["epsilon"],
+        number_dice=config["number_dice"],
+        solver_version=SOLVER_VERSION,
+        metadata={"game": config["game"], "policy": "hold threshold"},
+    )
+
+    return {
+        "config": config,
+        "solution": solution,
+        "policy": policy,
+        "status": "solved",
+        "seconds": seconds,
+        "peak_memory": peak_memory,
+        "win_probability": float(V[0, 0, 0]),
+    }
+
+
+def _store_manifest(manifest: list[dict], directory: str):
+    """Store the manifest, replacing the previous one only once it is completely written."""
+    os.makedirs(directory, exist_ok=True)
+    filename = os.path.join(directory, MANIFEST)
+    with open(filename + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(filename + ".tmp", filename)
+
+
+def main(argv: list[str] | None = None):
+    """Run a parameter sweep from the command line.
+
+    Args:
+        argv (list[str] | None, optional): Command line arguments. Defaults to None (sys.argv).
+    """
+    parser = argparse.ArgumentParser(description="Solve a grid of Pig and Piglet configurations.")
+    parser.add_argument("--games", nargs="+", default=["pig"], choices=GAMES, help="Games to solve.")
+    parser.add_argument("--goals", type=int, nargs="+", default=[100], help="Goals to solve.")
+    parser.add_argument("--dice-sides", type=int, nargs="+", default=[6], help="Dice sides (Pig).")
+    parser.add_argument("--number-dice", type=int, nargs="+", default=[1], help="Dice per roll (Pig).")
+    parser.add_argument("--epsilon", type=float, default=1e-6, help="Convergence parameter.")
+    parser.add_argument("--workers", type=int, help="Number of worker processes.")
+    parser.add_argument("--directory", default=SWEEP_DIRECTORY, help="Directory of the artifacts.")
+    args = parser.parse_args(argv)
+
+    configs = parameter_grid(
+        games=tuple(args.games),
+        goals=tuple(args.goals),
+        dice_sides=tuple(args.dice_sides),
+        number_dice=tuple(args.number_dice),
+        epsilon=args.epsilon,
+    )
+    run_sweep(configs, directory=args.directory, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
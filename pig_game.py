@@ -1,12 +1,179 @@
 """Module defining classes for the pig game mechanics, and pig players with different strategies."""
 
 import math
-import random
+import os
+from functools import partial
+
+import numpy as np
+
+from instrumentation import GameHook, bind_hooks
+
+
+class DiceSource:
+    """Buffered source of dice rolls, drawn in large blocks from a NumPy random number generator.
+
+    Each roll is available both as the raw dice value(s) and as its outcome (the sum of the dice, or
+    0 if any die shows the jeopardy value 1), which is precomputed for the whole block. A source can
+    be shared between players and games.
+    """
+
+    __slots__ = (
+        "dice_sides",
+        "number_dice",
+        "block_size",
+        "rng",
+        "_faces",
+        "_outcomes",
+        "_index",
+    )
+
+    def __init__(
+        self,
+        dice_sides: int = 6,
+        number_dice: int = 1,
+        seed: int | np.random.Generator | None = None,
+        block_size: int = 65536,
+    ):
+        """Initialise a dice source.
+
+        Args:
+            dice_sides (int, optional): The number of sides of the dice. Defaults to 6.
+            number_dice (int, optional): Number of dice per roll. Defaults to 1.
+            seed (int | np.random.Generator | None, optional): Seed or random number generator, for
+                reproducible rolls. Defaults to None.
+            block_size (int, optional): Number of rolls drawn at once. Defaults to 65536.
+        """
+        self.dice_sides = dice_sides
+        self.number_dice = number_dice
+        self.block_size = block_size
+        self.rng = np.random.default_rng(seed)
+        self._faces = []
+        self._outcomes = []
+        self._index = 0
+
+    def _refill(self) -> None:
+        """Draw the next block of rolls and precompute their outcomes."""
+        if self.number_dice == 1:
+            faces = self.rng.integers(1, self.dice_sides + 1, size=self.block_size)
+            outcomes = np.where(faces == 1, 0, faces)
+        else:
+            faces = self.rng.integers(
+                1, self.dice_sides + 1, size=(self.block_size, self.number_dice)
+            )
+            outcomes = np.where((faces == 1).any(axis=1), 0, faces.sum(axis=1))
+        self._faces = faces.tolist()
+        self._outcomes = outcomes.tolist()
+        self._index = 0
+
+    def roll(self) -> int | list[int]:
+        """Return the next dice roll(s).
+
+        Returns:
+            int | list[int]: Dice roll, or multiple dice rolls if there are multiple dice.
+        """
+        if self._index == len(self._faces):
+            self._refill()
+        self._index += 1
+        return self._faces[self._index - 1]
+
+    def outcome(self) -> int:
+        """Return the outcome of the next roll.
+
+        Returns:
+            int: Sum of the dice, or 0 if any die shows the jeopardy value 1.
+        """
+        if self._index == len(self._outcomes):
+            self._refill()
+        self._index += 1
+        return self._outcomes[self._index - 1]
+
+
+# Unseeded dice sources shared by the players not given one, per (dice_sides, number_dice)
+_default_dice_sources = {}
+
+
+def default_dice_source(dice_sides: int = 6, number_dice: int = 1) -> DiceSource:
+    """Return the shared unseeded dice source for a dice configuration.
+
+    Args:
+        dice_sides (int, optional): The number of sides of the dice. Defaults to 6.
+        number_dice (int, optional): Number of dice per roll. Defaults to 1.
+
+    Returns:
+        DiceSource: Shared dice source.
+    """
+    key = (dice_sides, number_dice)
+    if key not in _default_dice_sources:
+        _default_dice_sources[key] = DiceSource(dice_sides, number_dice)
+    return _default_dice_sources[key]
+
+
+def _reseed_default_dice_sources() -> None:
+    """Give the shared unseeded dice sources fresh entropy and discard their buffered rolls.
+
+    Forked processes inherit the sources, so without this every worker would roll the same dice.
+    The sources are reseeded in place, as players created before the fork still hold them.
+    """
+    for source in _default_dice_sources.values():
+        source.rng = np.random.default_rng()
+        source._faces = []
+        source._outcomes = []
+        source._index = 0
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reseed_default_dice_sources)
+
+
+def _turn_rule_rolls(player: "PigPlayer") -> tuple[str, int]:
+    return "rolls", player.expected_rolls_to_fail - 1
+
+
+def _turn_rule_cumulative_score(player: "PigPlayer") -> tuple[str, float]:
+    return "score", player.expected_avg_roll * (player.expected_rolls_to_fail - 1)
+
+
+def _turn_rule_at_20(player: "PigPlayer") -> tuple[str, int]:
+    return "score", 20
+
+
+# Turn rules of the heuristic strategies, shared with the batched engine (see simulation.hold_rule):
+# hold once the turn total reaches the threshold ("score"), or after the threshold number of
+# successful rolls ("rolls")
+TURN_RULES = {
+    "rolls": _turn_rule_rolls,
+    "cumulativeScore": _turn_rule_cumulative_score,
+    "holdAt20": _turn_rule_at_20,
+}
 
 
 class PigPlayer:
     """Player class for the game Pig."""
 
+    __slots__ = (
+        "_strategy",
+        "_policy",
+        "_table",
+        "_holds",
+        "_turn_rule",
+        "_is_failure",
+        "_roll_score",
+        "dice",
+        "number_dice",
+        "dice_sides",
+        "name",
+        "target",
+        "failure_roll",
+        "cumulative_score",
+        "round_score",
+        "round_rolls",
+        "prob_fail",
+        "expected_rolls_to_fail",
+        "expected_avg_roll",
+        "opponents",
+        "opponent_score",
+    )
+
     def __init__(
         self,
         name: str,
@@ -15,6 +182,7 @@ class PigPlayer:
         strategy: str = "rolls",
         number_dice: int = 1,
         policy=None,
+        dice: DiceSource | None = None,
     ):
         """Initialise a pig player.
 
@@ -25,7 +193,18 @@ class PigPlayer:
             dice_sides (int, optional): The number of sides of the dice. Defaults to 6.
             strategy (str, optional): The strategy to determine whether to play on or not.
             number_dice (int, optional): Number of dice to roll each turn. Defaults to 1.
-            policy (optional): Optimal Pig play policy. Defaults to None.
+            policy (optional): Optimal Pig play policy, one of:
+                               - a dictionary mapping states to "roll" or "hold",
+                               - a hold threshold table (see optimal_policy.extract_policy_table),
+                               - a boolean array of roll decisions indexed [i, j, k] (see
+                                 best_response.best_response),
+                               - an object with a should_roll(score, opponent_scores, turn_total)
+                                 method, given the scores of all opponents in turn order (see
+                                 n_player.NPlayerPolicy),
+                               - a shared policy oracle (see policy_oracle.PolicyOracle).
+                               Defaults to None.
+            dice (DiceSource | None, optional): Source of the dice rolls, which must match dice_sides and
+                                                number_dice. Defaults to a shared unseeded source.
 
         Raises:
             ValueError: Strategy is not a valid value.
@@ -33,7 +212,7 @@ class PigPlayer:
             TypeError: Number of dice is non-integer.
         """
         # Raise all possible errors
-        if strategy not in ["rolls", "cumulativeScore", "holdAt20", "optimal"]:
+        if strategy not in [*TURN_RULES, "optimal"]:
             raise ValueError(
                 "Invalid strategy - must be one of rolls, cumulativeScore, holdAt20, optimal"
             )
@@ -43,7 +222,6 @@ class PigPlayer:
             raise TypeError("Only integers are allowed for the number of dice.")
 
         # If passed error validation, set class variables.
-        self.strategy = strategy
         self.number_dice = number_dice
         self.dice_sides = dice_sides
         self.name = name
@@ -53,13 +231,69 @@ class PigPlayer:
         self.cumulative_score = 0
         self.round_score = 0
         self.round_rolls = 0
+        # Opponents are set by PigGame, which keeps their highest score up to date
+        self.opponents = []
+        self.opponent_score = 0
         # Strategy specific variables
         self.prob_fail = 1 - (1 - 1 / self.dice_sides) ** self.number_dice
         self.expected_rolls_to_fail = math.floor(1 / self.prob_fail)
         self.expected_avg_roll = (
             number_dice * sum(range(1, dice_sides + 1)) / dice_sides
         )
-        self.policy = policy
+        self._policy = policy
+        self.strategy = strategy
+        self.dice = dice if dice is not None else default_dice_source(dice_sides, number_dice)
+
+        # Resolve the roll handling for the number of dice once
+        if number_dice > 1:
+            self._is_failure = self._any_failure
+            self._roll_score = sum
+        else:
+            self._is_failure = self._single_failure
+            self._roll_score = int
+
+    @property
+    def strategy(self) -> str:
+        """str: The strategy to determine whether to play on or not."""
+        return self._strategy
+
+    @strategy.setter
+    def strategy(self, strategy: str) -> None:
+        self._strategy = strategy
+        self._resolve_strategy()
+
+    @property
+    def policy(self):
+        """Optimal Pig play policy, as a dictionary, a hold threshold table, an array of roll decisions,
+        an object with a should_roll method or a shared policy oracle (see __init__)."""
+        return self._policy
+
+    @policy.setter
+    def policy(self, policy) -> None:
+        self._policy = policy
+        self._resolve_strategy()
+
+    def _resolve_strategy(self) -> None:
+        """Bind the decision function of the strategy, so that it is not looked up on every roll."""
+        # Shared policy oracles (see policy_oracle.PolicyOracle) are read through their array
+        self._table = getattr(self._policy, "table", self._policy)
+        is_array = isinstance(self._table, np.ndarray)
+        if is_array and self._table.ndim == 3:
+            optimal = (self._holds_array, self._turn_rule_array)
+        elif is_array:
+            optimal = (self._holds_turn_rule, self._turn_rule_table)
+        elif hasattr(self._policy, "should_roll"):
+            optimal = (self._holds_should_roll, self._turn_rule_array)
+        else:
+            optimal = (self._holds_dict, self._turn_rule_dict)
+
+        if self._strategy in TURN_RULES:
+            self._holds = self._holds_turn_rule
+            self._turn_rule = partial(TURN_RULES[self._strategy], self)
+        elif self._strategy == "optimal":
+            self._holds, self._turn_rule = optimal
+        else:
+            self._holds, self._turn_rule = self._not_implemented, self._not_implemented
 
     def roll(self) -> int | list[int]:
         """Simulate dice roll(s) and return the value of the roll(s).
@@ -67,9 +301,7 @@ class PigPlayer:
         Returns:
             int | list[int]: Dice roll, or multiple dice rolls if there are multiple dice.
         """
-        if self.number_dice == 1:
-            return random.randint(1, self.dice_sides)
-        return [random.randint(1, self.dice_sides) for _ in range(self.number_dice)]
+        return self.dice.roll()
 
     def reset_round(self) -> None:
         """Reset the round to score 0 and number of rolls 0."""
@@ -93,33 +325,30 @@ class PigPlayer:
             bool: Whether to end the round or not.
         """
         # If the player rolls the jeopardy value, fail
-        failure = False
-        if self.number_dice > 1:
-            if any(roll == self.failure_roll for roll in roll_value):
-                failure = True
-        else:
-            if roll_value == self.failure_roll:
-                failure = True
-
-        if failure:
+        if self._is_failure(roll_value):
             self.reset_round()
             return True
 
         # Increase number of rolls and round score
         self.round_rolls += 1
-        self.increment_round_score(roll_value=roll_value)
+        self.round_score += self._roll_score(roll_value)
         return False
 
+    def _single_failure(self, roll_value: int) -> bool:
+        """Determine whether a single dice roll is the jeopardy value."""
+        return roll_value == self.failure_roll
+
+    def _any_failure(self, roll_value: list[int]) -> bool:
+        """Determine whether any of multiple dice rolls is the jeopardy value."""
+        return self.failure_roll in roll_value
+
     def increment_round_score(self, roll_value: int | list[int]) -> None:
         """Increment the round's score after a successful round depending on the number of die.
 
         Args:
             roll_value (int | list[int]): The dice roll(s).
         """
-        if self.number_dice > 1:
-            self.round_score += sum(roll_value)
-        else:
-            self.round_score += roll_value
+        self.round_score += self._roll_score(roll_value)
 
     def action(self) -> bool:
         """Determine if the player should play another round or not based on their strategy.
@@ -131,51 +360,119 @@ class PigPlayer:
         Returns:
             bool: Return True if the player should play another round, otherwise False.
         """
-        if self.strategy == "rolls":
-            if self.round_rolls == self.expected_rolls_to_fail - 1:
-                self.end_round()
-                return False
-            return True
+        if self._holds():
+            self.end_round()
+            return False
+        return True
 
-        elif self.strategy == "cumulativeScore":
-            if self.round_score >= self.expected_avg_roll * (
-                self.expected_rolls_to_fail - 1
-            ):
-                self.end_round()
-                return False
-            return True
+    def play_turn(self) -> None:
+        """Play a full turn, rolling until a failure or until the strategy holds.
 
-        elif self.strategy == "holdAt20":
-            if self.round_score >= 20:
-                self.end_round()
-                return False
-            return True
+        This is equivalent to alternating roll, determine_failure and action, but reads the
+        precomputed roll outcomes of the dice source, keeps the turn state in local variables and
+        evaluates the strategy as a fixed rule for the turn.
+        """
+        outcome = self.dice.outcome
+        kind, threshold = self._turn_rule()
+        round_score = self.round_score
+        round_rolls = self.round_rolls
+
+        while True:
+            value = outcome()
+            # If the player rolls the jeopardy value, fail
+            if not value:
+                self.reset_round()
+                return
+
+            # Increase number of rolls and round score, then apply the strategy
+            round_rolls += 1
+            round_score += value
+            if kind == "score":
+                if round_score >= threshold:
+                    break
+            elif kind == "rolls":
+                if round_rolls == threshold:
+                    break
+            else:
+                self.round_score = round_score
+                self.round_rolls = round_rolls
+                if self._holds():
+                    break
 
-        elif self.strategy == "optimal":
-            if self.policy is None:
-                raise ValueError("Policy must be provided for optimal strategy.")
+        self.round_score = round_score
+        self.end_round()
+
+    def _turn_rule_table(self) -> tuple[str, int]:
+        # The scores are fixed during the turn, so the table gives a fixed threshold
+        policy = self._table
+        score = self.cumulative_score
+        opponent_score = self.opponent_score
+        size_i, size_j = policy.shape
+        if score < size_i and opponent_score < size_j:
+            return "score", policy.item(score, opponent_score)
+        return "score", 0
+
+    def _turn_rule_array(self) -> tuple[str, None]:
+        # Roll decisions may depend on the turn total in any way, so are checked after every roll
+        # (arrays and policy objects)
+        return "policy", None
+
+    def _turn_rule_dict(self) -> tuple[str, None]:
+        if self._policy is None:
+            raise ValueError("Policy must be provided for optimal strategy.")
+        return "policy", None
+
+    def _holds_turn_rule(self) -> bool:
+        """Hold as the fixed rule of the turn does (heuristic strategies and hold threshold tables)."""
+        kind, threshold = self._turn_rule()
+        if kind == "rolls":
+            return self.round_rolls == threshold
+        return self.round_score >= threshold
+
+    def _holds_array(self) -> bool:
+        """Hold unless the array of roll decisions rolls in the state (hold outside the array)."""
+        policy = self._table
+        score = self.cumulative_score
+        opponent_score = self.opponent_score
+        round_score = self.round_score
+        size_i, size_j, size_k = policy.shape
+        return not (
+            score < size_i
+            and opponent_score < size_j
+            and round_score < size_k
+            and policy.item(score, opponent_score, round_score)
+        )
 
-            # Extract the opponent's score (the opponent with highest score)
-            opponent_score = max(p.cumulative_score for p in self.opponents)
+    def _holds_should_roll(self) -> bool:
+        """Hold unless the policy object rolls, given the scores of all opponents in turn order."""
+        return not self._policy.should_roll(
+            self.cumulative_score,
+            [opponent.cumulative_score for opponent in self.opponents],
+            self.round_score,
+        )
 
-            # Extract optimal action for the state
-            state = (self.cumulative_score, opponent_score, self.round_score)
-            action = self.policy.get(state, "hold")  # "hold" is default action
+    def _holds_dict(self) -> bool:
+        """Hold unless the policy rolls in the state ("hold" is default action)."""
+        if self._policy is None:
+            raise ValueError("Policy must be provided for optimal strategy.")
 
-            if action == "hold":
-                self.end_round()
-                return False
-            return True
+        state = (self.cumulative_score, self.opponent_score, self.round_score)
+        return self._policy.get(state, "hold") == "hold"
 
-        else:
-            raise NotImplementedError("Strategy not implemented!")
+    def _not_implemented(self) -> bool:
+        raise NotImplementedError("Strategy not implemented!")
 
 
 class PigGame:
     """Class simulating the pig game dynamics given a list of players."""
 
     def __init__(
-        self, players: list[PigPlayer], target: int = 50, print_terminal: bool = True
+        self,
+        players: list[PigPlayer],
+        target: int = 50,
+        print_terminal: bool = True,
+        seed: int | None = None,
+        hooks: list[GameHook] | None = None,
     ):
         """Set up the pig game.
 
@@ -183,11 +480,25 @@ class PigGame:
             players (list[PigPlayer]): List of pig players - the order determines the round order.
             target (int, optional): Target of cumulative rolls at which to end game. Defaults to 50.
             print_terminal (bool, optional): Whether to print output to terminal. Defaults to True.
+            seed (int | None, optional): If given, the players are given seeded dice sources (shared
+                                         between players with the same dice) for a reproducible game.
+                                         Defaults to None.
+            hooks (list[GameHook] | None, optional): Hooks called on the events of the game (see
+                                                     instrumentation.py). Defaults to None.
         """
+        if seed is not None:
+            sources = {}
+            for player in players:
+                key = (player.dice_sides, player.number_dice)
+                if key not in sources:
+                    sources[key] = DiceSource(*key, seed=np.random.default_rng([seed, *key]))
+                player.dice = sources[key]
+
         self.players = players
         self.target = target
         self.game_round = 1
         self.print_terminal = print_terminal
+        self.hooks = hooks or []
 
     def get_winner(self) -> PigPlayer:
         """Return the player who won the game.
@@ -205,24 +516,44 @@ class PigGame:
         )
 
     def simulate(self) -> None:
-        """Simulate the pig game."""
+        """Simulate the pig game.
+
+        Without hooks, each turn is played by PigPlayer.play_turn. With hooks, turns are played roll
+        by roll so that every event can be observed, drawing the same dice rolls.
+        """
+        players = self.players
+        target = self.target
+
+        events = bind_hooks(self.hooks) if self.hooks else None
+        if events:
+            for method in events["on_game_start"]:
+                method(self)
+
+        # Opponents (in turn order) and their highest score are required for players with optimal policy
+        for i, player in enumerate(players):
+            player.opponents = players[i + 1 :] + players[:i]
+            player.opponent_score = max(
+                (p.cumulative_score for p in player.opponents), default=0
+            )
+
         game_over = False
         while not game_over:
             if self.print_terminal:
                 print(f"\nRound {self.game_round}")
-            for i, player in enumerate(self.players):
-                # Opponents scores are required for players with optimal policy
-                player.opponents = self.players[:i] + self.players[i + 1 :]
-                while True:
-                    roll = player.roll()
-                    # Determine whether to end round due to fail
-                    if player.determine_failure(roll):
-                        break
-                    # Determine whether to end round due to strategy
-                    if not player.action():
-                        break
-
-                if player.cumulative_score >= self.target:
+            for player in players:
+                # Roll until the round ends due to fail or due to strategy
+                if events:
+                    self._play_hooked_turn(player, events)
+                else:
+                    player.play_turn()
+
+                # Scores only increase, so the opponents' highest score is updated incrementally
+                score = player.cumulative_score
+                for opponent in player.opponents:
+                    if score > opponent.opponent_score:
+                        opponent.opponent_score = score
+
+                if score >= target:
                     if self.print_terminal:
                         print(f"{player.name} has reached the target score!")
                     game_over = True
@@ -233,6 +564,37 @@ class PigGame:
                 for player in self.players:
                     print(f"{player.name}: {player.cumulative_score}")
 
+        if events:
+            winner = self.get_winner()
+            for method in events["on_game_end"]:
+                method(self, winner)
+
         # Announce winner
         if self.print_terminal:
             self.announce_winner()
+
+    def _play_hooked_turn(self, player: PigPlayer, events: dict) -> None:
+        """Play a full turn of a player, calling the hooks of each event (see bind_hooks)."""
+        for method in events["on_turn_start"]:
+            method(self, player)
+
+        while True:
+            turn_total = player.round_score
+            roll_value = player.roll()
+            failed = player.determine_failure(roll_value)
+            for method in events["on_roll"]:
+                method(self, player, roll_value)
+
+            if failed:
+                for method in events["on_bust"]:
+                    method(self, player, turn_total)
+                break
+
+            turn_total = player.round_score
+            if not player.action():
+                for method in events["on_hold"]:
+                    method(self, player, turn_total)
+                break
+
+        for method in events["on_turn_end"]:
+            method(self, player)
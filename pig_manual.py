@@ -1,105 +1,67 @@
 """Module providing the value iteration routine applied to the Pig game. Results are optionally stored to prevent rerunning the code many times."""
 
+from convergence import ConvergenceTracker
 from utilities import store_value_function
-
-
-goal = 100
-dice_sides = 6
-
-# Non-terminal states
-states = []
-for i in range(goal):
-    for j in range(goal):
-        for k in range(goal - i):
-            states.append((i, j, k))
-
-# Initialise value function
-V = {s: 0 for s in states}
-V_roll = {s: 0 for s in states}
-V_hold = {s: 0 for s in states}
-
-# Initialise convergence parameter
-epsilon = 1e-6
-
-# Progress Tracker
-progress = 1
-
-while True:
-    print(f"Iteration {progress}")
-
-    delta = 0
-    new_V = {}
-    new_V_roll = {}
-    new_V_hold = {}
-
-    for s in states:
-        i, j, k = s
-
-        # The player can hold and win
-        if i + k >= goal:
-            new_V[s] = 1
-            new_V_roll[s] = 0
-            new_V_hold[s] = 1
-
-        # If not a win
-        else:
-
-            if i + k + dice_sides >= goal:
-                # Smallest r that wins (i + k + r >= goal)
-                r_star = goal - i - k
-
-                if r_star <= 2:
-                    # All non-1 rolls are wins (roll = {1, 2})
-                    num_winning_rolls = dice_sides - 1
-                    roll_val = (1 / dice_sides) * (
-                        (1 - V[(j, i, 0)]) + num_winning_rolls
-                    )
-
-                else:
-                    # Some rolls are non-terminal, others are wins
-                    roll_val = (1 / dice_sides) * (
-                        (1 - V[(j, i, 0)])
-                        + sum(V[(i, j, k + r)] for r in range(2, r_star))
-                        + (dice_sides - r_star + 1)
-                    )
-            else:
-                roll_val = (1 / dice_sides) * (
-                    (1 - V[(j, i, 0)])
-                    + sum(V[(i, j, k + r)] for r in range(2, dice_sides + 1))
-                )
-
-            # Hold: turn passes with i+k added to score
-            if i + k >= goal:
-                hold_val = 1
-            else:
-                # (i, j, k) -> (j, i + k, 0)
-                # First bank the points and reset turn total: (i, j, k) -> (i + k, j, 0)
-                # Since "hold" action was taken, switch players: (j, i + k, 0)
-                hold_val = 1 - V[(j, i + k, 0)]
-
-            new_V[s] = max(roll_val, hold_val)
-            new_V_roll[s] = roll_val
-            new_V_hold[s] = hold_val
-
-            delta = max(delta, abs(new_V[s] - V[s]))
-
-    V = new_V
-    V_roll = new_V_roll
-    V_hold = new_V_hold
-
-    if delta < epsilon:
-        break
-
-    progress += 1
-
-# Store value function and action values for future use
-store_win_probabilities = True
-
-filename = f"data/value_function/pig/goal_{goal}.json"
-filename_hold = f"data/value_function/pig/hold_{goal}.json"
-filename_roll = f"data/value_function/pig/roll_{goal}.json"
-
-if store_win_probabilities:
-    store_value_function(filename=filename, V=V)
-    store_value_function(filename=filename_hold, V=V_hold)
-    store_value_function(filename=filename_roll, V=V_roll)
+from value_iteration import value_iteration
+
+
+def main(
+    goal: int = 100,
+    dice_sides: int = 6,
+    number_dice: int = 1,
+    epsilon: float = 1e-6,
+    method: str = "sweep",
+    track_convergence: bool = True,
+    store_win_probabilities: bool = True,
+):
+    """Solve Pig and store the value function and action values.
+
+    Use solver.solve for cached solutions without the stored files.
+
+    Args:
+        goal (int, optional): The number of points required to win. Defaults to 100.
+        dice_sides (int, optional): Number of dice sides. Defaults to 6.
+        number_dice (int, optional): Number of dice per roll. Defaults to 1.
+        epsilon (float, optional): Convergence parameter. Defaults to 1e-6.
+        method (str, optional): Solver method - "sweep" (global sweeps), "layered" (dependency
+            order by banked total) or "dirty" (backing up only the states whose successors changed).
+            Defaults to "sweep".
+        track_convergence (bool, optional): Whether to stream the convergence of every 1000th state
+            to disk (see convergence.plot_convergence). Defaults to True.
+        store_win_probabilities (bool, optional): Whether to store the value function and action
+            values for future use. Defaults to True.
+    """
+    # Multi-dice solutions are kept apart from the single die ones
+    suffix = "" if number_dice == 1 else f"_{number_dice}dice"
+
+    tracker_filename = f"data/value_function/pig/convergence_{goal}{suffix}.bin"
+    tracker = ConvergenceTracker(tracker_filename, stride=1000) if track_convergence else None
+
+    # Solve over the dense (goal x goal x goal) state space
+    V, V_roll, V_hold, _ = value_iteration(
+        goal=goal,
+        dice_sides=dice_sides,
+        epsilon=epsilon,
+        number_dice=number_dice,
+        method=method,
+        print_terminal=True,
+        tracker=tracker,
+    )
+
+    filename = f"data/value_function/pig/goal_{goal}{suffix}.bin"
+    filename_hold = f"data/value_function/pig/hold_{goal}{suffix}.bin"
+    filename_roll = f"data/value_function/pig/roll_{goal}{suffix}.bin"
+
+    if store_win_probabilities:
+        for name, values in [(filename, V), (filename_hold, V_hold), (filename_roll, V_roll)]:
+            store_value_function(
+                filename=name,
+                V=values,
+                dice_sides=dice_sides,
+                epsilon=epsilon,
+                number_dice=number_dice,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Module providing exact evaluation of the win probability of any pair of Pig strategies."""
+
+import numpy as np
+
+from pig_game import PigPlayer
+from simulation import hold_rule
+from value_iteration import layer_scores, roll_distribution
+
+
+def turn_outcomes(player: PigPlayer, goal: int = 100) -> tuple[np.ndarray, np.ndarray]:
+    """Compute the distribution of the points banked in a turn for every pair of scores.
+
+    The turn is followed roll by roll from turn total 0, applying the player's strategy after each
+    successful roll as PigPlayer.action does. Turn totals beyond goal + the largest roll are
+    counted as that total, which is already a win once banked.
+
+    Args:
+        player (PigPlayer): Player whose strategy, dice and policy to use.
+        goal (int, optional): The number of points required to win. Defaults to 100.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Probability of failing (turn passes with nothing banked) of
+            shape (goal, goal), and probability of banking each turn total of shape
+            (goal, goal, goal + largest roll), both indexed [score, opponent score].
+    """
+    rule = hold_rule(player)
+    probabilities = roll_distribution(player.dice_sides, player.number_dice)
+    size = goal + len(probabilities) - 1
+
+    i = np.arange(goal)[:, None, None]
+    j = np.arange(goal)[None, :, None]
+    k = np.arange(size)[None, None, :]
+
+    # Probability of being mid-turn at each turn total, starting from turn total 0
+    mass = np.zeros((goal, goal, size))
+    mass[:, :, 0] = 1
+    failure = np.zeros((goal, goal))
+    banked = np.zeros((goal, goal, size))
+
+    rolls = 0
+    while mass.sum() > 1e-15 and rolls < 100 * size:
+        rolls += 1
+        failure += probabilities[0] * mass.sum(axis=2)
+
+        rolled = np.zeros_like(mass)
+        for r in np.flatnonzero(probabilities[1:]) + 1:
+            rolled[:, :, r:] += probabilities[r] * mass[:, :, :-r]
+            rolled[:, :, -1] += probabilities[r] * mass[:, :, -r:].sum(axis=2)
+
+        # Apply the strategy after the successful roll
+        hold = np.broadcast_to(rule(i, j, k, rolls), rolled.shape)
+        banked += np.where(hold, rolled, 0)
+        mass = np.where(hold, 0, rolled)
+
+    return failure, banked
+
+
+def evaluate_policies(
+    player_1: PigPlayer, player_2: PigPlayer, goal: int = 100
+) -> tuple[np.ndarray, np.ndarray]:
+    """Compute the exact win probabilities of two players following fixed strategies.
+
+    Scores never decrease, so the turn start states are solved in decreasing order of the banked
+    total i + j. Within a total, a failed turn only swaps the player to move, so each state and its
+    swapped state form a 2 x 2 linear system that is solved exactly.
+
+    Args:
+        player_1 (PigPlayer): First player, whose strategy, dice and policy to use.
+        player_2 (PigPlayer): Second player, whose strategy, dice and policy to use.
+        goal (int, optional): The number of points required to win. Defaults to 100.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Probability that player 1 wins when about to start a turn, and
+            probability that player 2 wins when about to start a turn, both of shape (goal, goal)
+            indexed [score of player to move, score of the other player].
+    """
+    failure_1, banked_1 = turn_outcomes(player_1, goal=goal)
+    failure_2, banked_2 = turn_outcomes(player_2, goal=goal)
+
+    P_1 = np.zeros((goal, goal))
+    P_2 = np.zeros((goal, goal))
+
+    for total in range(2 * goal - 2, -1, -1):
+        scores = layer_scores(total, goal)
+        opponent_scores = total - scores
+
+        # Win probability from banking a positive turn total (banking past the goal is a win)
+        c_1 = _banked_value(banked_1, P_2, scores, opponent_scores, goal)
+        c_2 = _banked_value(banked_2, P_1, opponent_scores, scores, goal)
+
+        # Solve x = a (1 - y) + c_1, y = b (1 - x) + c_2 for x = P_1[i, j], y = P_2[j, i]
+        a = failure_1[scores, opponent_scores]
+        b = failure_2[opponent_scores, scores]
+        x = (a * (1 - b - c_2) + c_1) / (1 - a * b)
+        P_1[scores, opponent_scores] = x
+        P_2[opponent_scores, scores] = b * (1 - x) + c_2
+
+    return P_1, P_2
+
+
+def win_probability(player_1: PigPlayer, player_2: PigPlayer, goal: int = 100) -> float:
+    """Compute the exact probability that player 1 wins a game in which they start.
+
+    Args:
+        player_1 (PigPlayer): Starting player, whose strategy, dice and policy to use.
+        player_2 (PigPlayer): Second player, whose strategy, dice and policy to use.
+        goal (int, optional): The number of points required to win. Defaults to 100.
+
+    Returns:
+        float: Probability that player 1 wins.
+    """
+    P_1, _ = evaluate_policies(player_1, player_2, goal=goal)
+    return float(P_1[0, 0])
+
+
+def _banked_value(
+    banked: np.ndarray,
+    P_other: np.ndarray,
+    scores: np.ndarray,
+    opponent_scores: np.ndarray,
+    goal: int,
+) -> np.ndarray:
+    """Sum the win probability over the positive turn totals banked from a layer of states."""
+    size = banked.shape[2]
+    padded = np.zeros((goal, goal + size))
+    padded[:, :goal] = P_other
+
+    totals = np.arange(1, size)
+    next_scores = scores[:, None] + totals
+    wins = 1 - padded[opponent_scores[:, None], next_scores]
+    return (banked[scores, opponent_scores][:, 1:] * wins).sum(axis=1)
@@ -0,0 +1,236 @@
+"""Module providing a Pig policy and value oracle in shared memory, loaded once and read by any number of worker processes."""
+
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Byte alignment of the arrays within the segment
+ALIGNMENT = 64
+
+# Segments attached in this process, by name, so that each is only attached once
+_attached = {}
+
+
+class PolicyOracle:
+    """Optimal policy (and optionally the value function) of Pig, stored in a shared memory segment.
+
+    The process that creates the oracle owns the segment, and unlinks it on close. Pickling an
+    oracle only sends the name and layout of the segment, so passing it to a worker process attaches
+    the worker to the same memory, read-only, without copying the arrays. PigPlayer (and
+    simulation.simulate_games) read the policy through its table attribute.
+    """
+
+    __slots__ = ("table", "values", "goal", "_segment", "_layout", "_owner")
+
+    def __init__(
+        self,
+        segment: shared_memory.SharedMemory,
+        layout: dict[str, tuple[tuple[int, ...], str, int]],
+        goal: int,
+        owner: bool,
+    ):
+        """Initialise the oracle over a segment (see PolicyOracle.create and PolicyOracle.attach).
+
+        Args:
+            segment (shared_memory.SharedMemory): Segment holding the arrays.
+            layout (dict[str, tuple[tuple[int, ...], str, int]]): Shape, data type and byte offset
+                of the "table" and, if stored, the "values".
+            goal (int): The number of points required to win.
+            owner (bool): Whether this process created (and so unlinks) the segment.
+        """
+        self._segment = segment
+        self._layout = layout
+        self._owner = owner
+        self.goal = goal
+
+        arrays = {}
+        for name, (shape, dtype, offset) in layout.items():
+            array = np.ndarray(shape, np.dtype(dtype), buffer=segment.buf, offset=offset)
+            array.flags.writeable = False
+            arrays[name] = array
+        self.table = arrays["table"]
+        self.values = arrays.get("values")
+
+    @classmethod
+    def create(cls, policy: np.ndarray | dict, values: np.ndarray | None = None) -> "PolicyOracle":
+        """Copy a policy (and value function) into a new shared memory segment.
+
+        Args:
+            policy (np.ndarray | dict): Hold threshold table (see optimal_policy.extract_policy_table),
+                boolean array of roll decisions indexed [i, j, k], or dictionary policy, which is
+                expanded to an array of roll decisions (see simulation.policy_to_array).
+            values (np.ndarray | None, optional): Value function of shape (goal, goal, goal).
+                Defaults to None.
+
+        Raises:
+            ValueError: The policy is not a hold threshold table or an array of roll decisions.
+
+        Returns:
+            PolicyOracle: Oracle owning the segment.
+        """
+        if isinstance(policy, dict):
+            from simulation import policy_to_array
+
+            policy = policy_to_array(policy)
+        policy = np.asarray(policy)
+        if policy.ndim not in (2, 3):
+            raise ValueError("Policy must be a hold threshold table or an array of roll decisions.")
+
+        arrays = {"table": policy}
+        if values is not None:
+            arrays["values"] = np.asarray(values)
+
+        layout = {}
+        size = 0
+        for name, array in arrays.items():
+            layout[name] = (array.shape, array.dtype.str, size)
+            size += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+
+        segment = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        for name, array in arrays.items():
+            shape, dtype, offset = layout[name]
+            np.ndarray(shape, np.dtype(dtype), buffer=segment.buf, offset=offset)[...] = array
+
+        return cls(segment, layout, goal=policy.shape[0], owner=True)
+
+    @classmethod
+    def from_solution(
+        cls,
+        game: str = "pig",
+        goal: int = 100,
+        dice_sides: int = 6,
+        number_dice: int = 1,
+        values: bool = True,
+    ) -> "PolicyOracle":
+        """Load (or compute) a solution with solver.solve and place its policy in shared memory.
+
+        The policy is stored as the exact roll decisions of every state, rolling where the value of
+        rolling exceeds the value of holding, rather than as a hold threshold table, which is not
+        exact in a few states (see optimal_policy.find_non_monotone_states).
+
+        Args:
+            game (str, optional): Game, "pig" or "piglet". Defaults to "pig".
+            goal (int, optional): The number of points required to win. Defaults to 100.
+            dice_sides (int, optional): Number of dice sides (Pig only). Defaults to 6.
+            number_dice (int, optional): Number of dice per roll (Pig only). Defaults to 1.
+            values (bool, optional): Whether to also store the value function. Defaults to True.
+
+        Returns:
+            PolicyOracle: Oracle owning the segment.
+        """
+        from solver import solve
+
+        V, V_roll, V_hold = solve(
+            game=game, goal=goal, dice_sides=dice_sides, number_dice=number_dice
+        )
+        return cls.create(np.asarray(V_roll > V_hold), values=V if values else None)
+
+    @classmethod
+    def attach(
+        cls, name: str, layout: dict[str, tuple[tuple[int, ...], str, int]], goal: int
+    ) -> "PolicyOracle":
+        """Attach to the segment of an oracle created by another process.
+
+        Each segment is attached once per process, and the oracle is shared by later attachments.
+
+        Args:
+            name (str): Name of the segment.
+            layout (dict[str, tuple[tuple[int, ...], str, int]]): Layout of the arrays (see __init__).
+            goal (int): The number of points required to win.
+
+        Returns:
+            PolicyOracle: Oracle reading the segment.
+        """
+        if name not in _attached:
+            _attached[name] = cls(shared_memory.SharedMemory(name=name), layout, goal, owner=False)
+        return _attached[name]
+
+    @property
+    def name(self) -> str:
+        """str: Name of the shared memory segment."""
+        return self._segment.name
+
+    def __reduce__(self):
+        return (PolicyOracle.attach, (self._segment.name, self._layout, self.goal))
+
+    def __enter__(self) -> "PolicyOracle":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Release the arrays, unlinking the segment in the process that created it."""
+        self.table = None
+        self.values = None
+        try:
+            self._segment.close()
+        except BufferError:
+            # Views of the arrays held elsewhere (e.g. by players) keep the memory mapped until
+            # they are released
+            pass
+        if self._owner:
+            self._segment.unlink()
+        _attached.pop(self._segment.name, None)
+
+    def roll_decisions(
+        self, scores: np.ndarray, opponent_scores: np.ndarray, turn_totals: np.ndarray
+    ) -> np.ndarray:
+        """Look up the actions of many states at once.
+
+        Args:
+            scores (np.ndarray): Scores of the player to move.
+            opponent_scores (np.ndarray): Scores of the opponent.
+            turn_totals (np.ndarray): Turn totals of the player to move.
+
+        Returns:
+            np.ndarray: True where the policy rolls (holding outside the table).
+        """
+        i, j, k = np.broadcast_arrays(scores, opponent_scores, turn_totals)
+        table = self.table
+        inside = (i < table.shape[0]) & (j < table.shape[1])
+        i, j = np.minimum(i, table.shape[0] - 1), np.minimum(j, table.shape[1] - 1)
+        if table.ndim == 2:
+            return inside & (k < table[i, j])
+        inside &= k < table.shape[2]
+        return inside & table[i, j, np.minimum(k, table.shape[2] - 1)]
+
+    def win_probabilities(
+        self, scores: np.ndarray, opponent_scores: np.ndarray, turn_totals: np.ndarray
+    ) -> np.ndarray:
+        """Look up the win probabilities of many states at once.
+
+        Args:
+            scores (np.ndarray): Scores of the player to move.
+            opponent_scores (np.ndarray): Scores of the opponent.
+            turn_totals (np.ndarray): Turn totals of the player to move.
+
+        Raises:
+            ValueError: The oracle holds no value function.
+
+        Returns:
+            np.ndarray: Probability that the player to move wins, 1 once the score and turn total
+                reach the goal and 0 once the opponent's score does.
+        """
+        if self.values is None:
+            raise ValueError("The oracle holds no value function.")
+
+        i, j, k = np.broadcast_arrays(scores, opponent_scores, turn_totals)
+        goal = self.goal
+        last = goal - 1
+        inside = (i + k < goal) & (j < goal)
+        value = self.values[np.minimum(i, last), np.minimum(j, last), np.minimum(k, last)]
+        return np.where(inside, value, np.where(j >= goal, 0.0, 1.0))
+
+    def should_roll(self, score: int, opponent_scores: list[int], turn_total: int) -> bool:
+        """Determine whether the policy rolls in a single state.
+
+        Args:
+            score (int): Score of the player to move.
+            opponent_scores (list[int]): Scores of the opponents, of which the highest is used.
+            turn_total (int): Turn total of the player to move.
+
+        Returns:
+            bool: Whether to roll.
+        """
+        return bool(self.roll_decisions(score, max(opponent_scores), turn_total))
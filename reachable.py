@@ -1,41 +1,42 @@
 """Module computing the reachablity of each of the states under the optimal policy for the game Pig."""
 
+from occupancy import reachability, state_occupancy
 from optimal_policy import extract_optimal_policy
-from utilities import load_value_function, store_value_function
+from pig_game import PigPlayer
+from solver import solve
+from utilities import store_value_function
 
-# Load raw value function from JSON
-filename = "data/value_function/pig/goal_100.json"
-V = load_value_function(filename)
 
-# Extract optimal policy
-optimal_policy = extract_optimal_policy(V=V, goal=100)
+def main(goal: int = 100, opponent_score: int = 30, store_reachable: bool = True):
+    """Compute and store the reachability of a cross section of the states under the optimal policy.
 
-reachable = {(0, 30, 0): 1}  # define this initial state as reachable
+    Args:
+        goal (int, optional): The number of points required to win. Defaults to 100.
+        opponent_score (int, optional): Opponent's score of the cross section. Defaults to 30.
+        store_reachable (bool, optional): Whether to store the reachability. Defaults to True.
+    """
+    # Value function from the solution cache (solved on the first run)
+    V, _, _ = solve(game="pig", goal=goal)
 
-# initialise
-goal = 100  # set goal
-j = 30  # set opponent score for cross section
+    # Extract optimal policy
+    optimal_policy = extract_optimal_policy(V=V, goal=goal)
 
-for i in range(goal):
-    for k in range(goal):
-        # see if a state is reachable
-        try:
-            if reachable[(i, j, k)] == 1 and optimal_policy[(i, j, k)] == "roll":
-                # from 2,3,4,5,6 to add reachability
-                for x in range(2, 7):
-                    if i + k + x < 100:
-                        reachable[(i, j, k + x)] = 1
+    # Both players follow the optimal policy from the start of the game, so the opponent's score
+    # also changes during play (states where either player is to move are counted)
+    player = PigPlayer("Optimal", target=goal, strategy="optimal", policy=optimal_policy)
+    occupancy_1, occupancy_2 = state_occupancy(player, player, goal=goal)
+    cross_section = reachability(occupancy_1 + occupancy_2, opponent_score=opponent_score)
 
-            elif reachable[(i, j, k)] == 1 and optimal_policy[(i, j, k)] == "hold":
-                if i + k < 100:
-                    reachable[(i + k, j, 0)] = 1
+    j = opponent_score
+    reachable = {
+        (i, j, k): int(cross_section[i, k]) for i in range(goal) for k in range(goal)
+    }
 
-        # KeyError likely to exist if state is not reachable, then
-        except KeyError:
-            reachable[(i, j, k)] = 0
+    filename = f"data/reachable/pig/goal_{goal}_opponent_score_{j}.json"
 
-store_reachable = True
-filename = f"data/reachable/pig/goal_{goal}_opponent_score_{j}.json"
+    if store_reachable:
+        store_value_function(filename=filename, V=reachable)
 
-if store_reachable:
-    store_value_function(filename=filename, V=reachable)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,423 @@
+"""Module providing a batched, vectorised Monte Carlo engine that advances many Pig games at once."""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable
+
+import numpy as np
+
+from pig_game import TURN_RULES, PigPlayer
+from policy_oracle import PolicyOracle
+from utilities import compute_confidence_interval
+
+HoldRule = Callable[[np.ndarray, np.ndarray, np.ndarray, np.ndarray], np.ndarray]
+
+
+def hold_rule(player: PigPlayer) -> HoldRule:
+    """Vectorise the strategy of a player, matching PigPlayer.action.
+
+    Args:
+        player (PigPlayer): Player whose strategy, dice and policy to use.
+
+    Raises:
+        ValueError: If the chosen strategy is optimal, a policy must be provided.
+        ValueError: Policy objects (N-player policies) cannot be vectorised.
+
+    Returns:
+        HoldRule: Function of (score, opponent score, turn total, turn rolls) arrays, called after a
+            successful roll, returning True where the player holds.
+    """
+    # Heuristic strategies share the turn rules of PigPlayer
+    if player.strategy in TURN_RULES:
+        kind, threshold = TURN_RULES[player.strategy](player)
+        if kind == "rolls":
+            return lambda i, j, k, rolls: rolls == threshold
+        return lambda i, j, k, rolls: k >= threshold
+
+    # Shared policy oracles (see policy_oracle.PolicyOracle) are read through their array
+    policy = getattr(player.policy, "table", player.policy)
+    if policy is None:
+        raise ValueError("Policy must be provided for optimal strategy.")
+    if hasattr(policy, "should_roll"):
+        raise ValueError("Policy objects are only supported by PigGame.")
+
+    # Roll while the turn total is below the threshold, holding outside the table
+    if isinstance(policy, np.ndarray) and policy.ndim == 2:
+        table = policy
+        size_i, size_j = table.shape
+
+        def rule(i, j, k, rolls):
+            inside = (i < size_i) & (j < size_j)
+            threshold = table[np.minimum(i, size_i - 1), np.minimum(j, size_j - 1)]
+            return ~(inside & (k < threshold))
+
+        return rule
+
+    # Dictionary policies are expanded to a dense array of roll decisions
+    rolls_array = policy if isinstance(policy, np.ndarray) else policy_to_array(policy)
+    size = rolls_array.shape[0]
+
+    def rule(i, j, k, rolls):
+        inside = (i < size) & (j < size) & (k < size)
+        last = size - 1
+        return ~(
+            inside
+            & rolls_array[np.minimum(i, last), np.minimum(j, last), np.minimum(k, last)]
+        )
+
+    return rule
+
+
+def policy_to_array(policy: dict[tuple[int, int, int], str]) -> np.ndarray:
+    """Expand a dictionary policy to a dense array of roll decisions ("hold" is default action).
+
+    Args:
+        policy (dict[tuple[int, int, int], str]): Action policy per state.
+
+    Returns:
+        np.ndarray: Boolean array of shape (goal, goal, goal), True where the policy rolls.
+    """
+    size = 1 + max(max(state) for state in policy)
+    roll_states = np.array(
+        [state for state, action in policy.items() if action == "roll"], dtype=int
+    ).reshape(-1, 3)
+    rolls_array = np.zeros((size, size, size), dtype=bool)
+    rolls_array[roll_states[:, 0], roll_states[:, 1], roll_states[:, 2]] = True
+    return rolls_array
+
+
+def draw_outcomes(
+    rng: np.random.Generator, size: int, dice_sides: int = 6, number_dice: int = 1
+) -> np.ndarray:
+    """Draw dice rolls and reduce them to their outcome.
+
+    Args:
+        rng (np.random.Generator): Random number generator.
+        size (int): Number of rolls to draw.
+        dice_sides (int, optional): Number of dice sides. Defaults to 6.
+        number_dice (int, optional): Number of dice per roll. Defaults to 1.
+
+    Returns:
+        np.ndarray: Sum of the dice, or 0 where any die shows the jeopardy value 1.
+    """
+    if number_dice == 1:
+        faces = rng.integers(1, dice_sides + 1, size=size)
+        return np.where(faces == 1, 0, faces)
+
+    faces = rng.integers(1, dice_sides + 1, size=(size, number_dice))
+    return np.where((faces == 1).any(axis=1), 0, faces.sum(axis=1))
+
+
+def simulate_games(
+    players: list[PigPlayer],
+    n_games: int,
+    target: int = 100,
+    starting_player: int | np.ndarray = 0,
+    rng: np.random.Generator | int | None = None,
+) -> np.ndarray:
+    """Simulate many Pig games at once, following the rules of PigGame.simulate.
+
+    The games are stored as arrays of scores, turn totals, turn rolls and whose turn it is. Each
+    step draws one roll for every unfinished game and applies the players' strategies by array
+    indexing.
+
+    Args:
+        players (list[PigPlayer]): Players whose strategy, dice and policy to use - the order
+            determines the round order.
+        n_games (int): Number of games to simulate.
+        target (int, optional): Target of cumulative rolls at which to end game. Defaults to 100.
+        starting_player (int | np.ndarray, optional): Index of the player starting each game, for
+            all games or per game. Defaults to 0.
+        rng (np.random.Generator | int | None, optional): Random number generator or seed. Defaults to None.
+
+    Returns:
+        np.ndarray: Index of the winning player of each game.
+    """
+    rng = np.random.default_rng(rng)
+    rules = [hold_rule(player) for player in players]
+    n_players = len(players)
+    shared_dice = len({(p.dice_sides, p.number_dice) for p in players}) == 1
+
+    # State of the unfinished games (game index, scores, turn, turn total, turn rolls)
+    games = np.arange(n_games)
+    scores = np.zeros((n_players, n_games), dtype=np.int64)
+    turn = np.broadcast_to(np.asarray(starting_player), (n_games,)).astype(np.int64)
+    turn_total = np.zeros(n_games, dtype=np.int64)
+    turn_rolls = np.zeros(n_games, dtype=np.int64)
+    winners = np.full(n_games, -1, dtype=np.int64)
+
+    while games.size:
+        columns = np.arange(games.size)
+
+        # One roll for every unfinished game, drawn in a single call when the players share dice
+        if shared_dice:
+            outcome = draw_outcomes(
+                rng, games.size, players[0].dice_sides, players[0].number_dice
+            )
+        else:
+            outcome = np.zeros(games.size, dtype=np.int64)
+            for p, player in enumerate(players):
+                outcome = np.where(
+                    turn == p,
+                    draw_outcomes(rng, games.size, player.dice_sides, player.number_dice),
+                    outcome,
+                )
+
+        # Increase number of rolls and turn total on success, reset them on failure
+        success = outcome > 0
+        turn_total = np.where(success, turn_total + outcome, 0)
+        turn_rolls = np.where(success, turn_rolls + 1, 0)
+
+        # Apply the strategy of the player whose turn it is
+        score = scores[turn, columns]
+        if n_players == 2:
+            opponent_score = scores[1 - turn, columns]
+        else:
+            opponent_score = np.where(
+                np.arange(n_players)[:, None] == turn, -1, scores
+            ).max(axis=0)
+
+        hold = np.zeros(games.size, dtype=bool)
+        for p, rule in enumerate(rules):
+            hold = np.where(
+                turn == p, rule(score, opponent_score, turn_total, turn_rolls), hold
+            )
+        hold &= success
+
+        # Bank the turn total when holding
+        score = np.where(hold, score + turn_total, score)
+        scores[turn, columns] = score
+        finished = hold & (score >= target)
+        winners[games[finished]] = turn[finished]
+
+        # The turn passes on a failure or a hold
+        passing = ~success | hold
+        turn_total[hold] = 0
+        turn_rolls[hold] = 0
+        turn = np.where(passing, (turn + 1) % n_players, turn)
+
+        if finished.any():
+            keep = ~finished
+            games, scores, turn = games[keep], scores[:, keep], turn[keep]
+            turn_total, turn_rolls = turn_total[keep], turn_rolls[keep]
+
+    return winners
+
+
+def batched_competition(
+    player_1_strategy: str,
+    player_2_strategy: str,
+    optimal_policy: None | dict[tuple[int, int, int], str] | np.ndarray = None,
+    target: int = 100,
+    rounds: int = 1000,
+    rng: np.random.Generator | int | None = None,
+) -> tuple[float, float, float]:
+    """Run the Pig competition with the batched engine (see utilities.competition).
+
+    Args:
+        player_1_strategy (str): Player 1 strategy.
+        player_2_strategy (str): Player 2 strategy.
+        optimal_policy (None | dict[tuple[int, int, int], str] | np.ndarray, optional): Optimal Pig game
+            policy, as a dictionary or a hold threshold table. Defaults to None.
+        target (int, optional): Goal of the game to win. Defaults to 100.
+        rounds (int, optional): Number of simulations to run. Defaults to 1000.
+        rng (np.random.Generator | int | None, optional): Random number generator or seed. Defaults to None.
+
+    Returns:
+        tuple[float, float, float]: mean proportion, lower confidence bound, upper confidence bound.
+    """
+    players = [
+        PigPlayer(
+            name=f"player_{n}",
+            target=target,
+            strategy=strategy,
+            policy=optimal_policy if strategy == "optimal" else None,
+        )
+        for n, strategy in enumerate([player_1_strategy, player_2_strategy], start=1)
+    ]
+    winners = simulate_games(players, n_games=rounds, target=target, rng=rng)
+
+    return compute_confidence_interval(wins=int((winners == 0).sum()), trials=rounds)
+
+
+def batched_competition_random_start(
+    optimal_policy: dict[tuple[int, int, int], str] | np.ndarray,
+    target: int = 100,
+    rounds: int = 1000,
+    rng: np.random.Generator | int | None = None,
+) -> tuple[float, float, float]:
+    """Run optimal vs holdAt20 games with random starting positions with the batched engine.
+
+    See utilities.competition_random_start.
+
+    Args:
+        optimal_policy (dict[tuple[int, int, int], str] | np.ndarray): Optimal Pig game policy, as a
+            dictionary or a hold threshold table.
+        target (int, optional): Goal of the game to win. Defaults to 100.
+        rounds (int, optional): Number of simulations to run. Defaults to 1000.
+        rng (np.random.Generator | int | None, optional): Random number generator or seed. Defaults to None.
+
+    Returns:
+        tuple[float, float, float]: mean proportion, lower confidence bound, upper confidence bound.
+    """
+    rng = np.random.default_rng(rng)
+    players = [
+        PigPlayer(name="optimal", target=target, strategy="optimal", policy=optimal_policy),
+        PigPlayer(name="holdAt20", target=target, strategy="holdAt20"),
+    ]
+    starting_player = (rng.random(rounds) >= 0.5).astype(np.int64)
+    winners = simulate_games(
+        players, n_games=rounds, target=target, starting_player=starting_player, rng=rng
+    )
+
+    return compute_confidence_interval(wins=int((winners == 0).sum()), trials=rounds)
+
+
+def sequential_competition(
+    player_1_strategy: str,
+    player_2_strategy: str,
+    optimal_policy: None | dict[tuple[int, int, int], str] | np.ndarray = None,
+    target: int = 100,
+    half_width: float | None = 0.01,
+    threshold: float | None = None,
+    batch_size: int = 1000,
+    max_games: int = 100000,
+    confidence: float = 0.95,
+    method: str = "clopper-pearson",
+    rng: np.random.Generator | int | None = None,
+) -> tuple[float, float, float, int]:
+    """Run the Pig competition in batches until the proportion of starter player wins is settled.
+
+    After each batch the confidence interval is updated, and the games stop as soon as its half
+    width is below half_width, or it lies entirely on one side of threshold, or max_games are played.
+    To stay valid despite looking at the interval after every batch, the n-th look uses the
+    confidence level 1 - (1 - confidence) * 6 / (pi^2 n^2), so that the error probabilities over all
+    looks sum to at most 1 - confidence.
+
+    Args:
+        player_1_strategy (str): Player 1 strategy.
+        player_2_strategy (str): Player 2 strategy.
+        optimal_policy (None | dict[tuple[int, int, int], str] | np.ndarray, optional): Optimal Pig game
+            policy, as a dictionary or a hold threshold table. Defaults to None.
+        target (int, optional): Goal of the game to win. Defaults to 100.
+        half_width (float | None, optional): Target half width of the interval. Defaults to 0.01.
+        threshold (float | None, optional): Decision threshold - stop once the interval excludes it.
+            Defaults to None.
+        batch_size (int, optional): Number of games per batch. Defaults to 1000.
+        max_games (int, optional): Maximum number of games to play. Defaults to 100000.
+        confidence (float, optional): Overall confidence level required. Defaults to 0.95.
+        method (str, optional): Interval method of utilities.compute_confidence_interval. Defaults to
+            "clopper-pearson".
+        rng (np.random.Generator | int | None, optional): Random number generator or seed. Defaults to None.
+
+    Returns:
+        tuple[float, float, float, int]: mean proportion, lower confidence bound, upper confidence
+            bound, number of games played.
+    """
+    rng = np.random.default_rng(rng)
+    players = [
+        PigPlayer(
+            name=f"player_{n}",
+            target=target,
+            strategy=strategy,
+            policy=optimal_policy if strategy == "optimal" else None,
+        )
+        for n, strategy in enumerate([player_1_strategy, player_2_strategy], start=1)
+    ]
+
+    wins = 0
+    games = 0
+    look = 0
+    while True:
+        size = min(batch_size, max_games - games)
+        winners = simulate_games(players, n_games=size, target=target, rng=rng)
+        wins += int((winners == 0).sum())
+        games += size
+        look += 1
+
+        look_confidence = 1 - (1 - confidence) * 6 / (np.pi**2 * look**2)
+        p, lower, upper = compute_confidence_interval(
+            wins=wins, trials=games, confidence=look_confidence, method=method
+        )
+
+        precise = half_width is not None and (upper - lower) / 2 <= half_width
+        decided = threshold is not None and (lower > threshold or upper < threshold)
+        if precise or decided or games >= max_games:
+            return p, lower, upper, games
+
+
+def parallel_competition(
+    player_1_strategy: str,
+    player_2_strategy: str,
+    optimal_policy: None | dict[tuple[int, int, int], str] | np.ndarray | PolicyOracle = None,
+    target: int = 100,
+    rounds: int = 1000,
+    seed: int | None = None,
+    workers: int | None = None,
+    chunk_size: int = 10000,
+) -> tuple[float, float, float]:
+    """Run the Pig competition with the batched engine across a pool of processes.
+
+    The rounds are split into chunks of a fixed size, each played with its own random stream spawned
+    from the seed, so that the result for a given seed does not depend on the number of workers. The
+    optimal policy is placed in shared memory once (see policy_oracle.PolicyOracle) instead of being
+    pickled to every worker.
+
+    Args:
+        player_1_strategy (str): Player 1 strategy.
+        player_2_strategy (str): Player 2 strategy.
+        optimal_policy (None | dict[tuple[int, int, int], str] | np.ndarray | PolicyOracle, optional):
+            Optimal Pig game policy, as a dictionary, a hold threshold table or an existing shared
+            policy oracle, which is used as is. Defaults to None.
+        target (int, optional): Goal of the game to win. Defaults to 100.
+        rounds (int, optional): Number of simulations to run. Defaults to 1000.
+        seed (int | None, optional): Seed of the random streams. Defaults to None.
+        workers (int | None, optional): Number of worker processes, or None for one per CPU. With a
+            single worker the chunks are played in this process. Defaults to None.
+        chunk_size (int, optional): Number of games per chunk. Defaults to 10000.
+
+    Returns:
+        tuple[float, float, float]: mean proportion, lower confidence bound, upper confidence bound.
+    """
+    strategies = (player_1_strategy, player_2_strategy)
+    sizes = [min(chunk_size, rounds - start) for start in range(0, rounds, chunk_size)]
+    streams = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    if isinstance(optimal_policy, dict):
+        optimal_policy = policy_to_array(optimal_policy)
+
+    # Workers only receive the name of the shared policy, and attach to it once per process
+    oracle = None
+    if workers != 1 and isinstance(optimal_policy, np.ndarray):
+        oracle = PolicyOracle.create(optimal_policy)
+    policy = optimal_policy if oracle is None else oracle
+    tasks = [(strategies, policy, target, size, stream) for size, stream in zip(sizes, streams)]
+
+    try:
+        if workers == 1:
+            wins = sum(map(_play_chunk, tasks))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                wins = sum(executor.map(_play_chunk, tasks))
+    finally:
+        if oracle is not None:
+            oracle.close()
+
+    return compute_confidence_interval(wins=wins, trials=rounds)
+
+
+def _play_chunk(task: tuple) -> int:
+    """Play a chunk of games in a worker and return the number of player 1 wins."""
+    strategies, policy, target, size, stream = task
+    players = [
+        PigPlayer(
+            name=f"player_{n}",
+            target=target,
+            strategy=strategy,
+            policy=policy if strategy == "optimal" else None,
+        )
+        for n, strategy in enumerate(strategies, start=1)
+    ]
+    winners = simulate_games(
+        players, n_games=size, target=target, rng=np.random.default_rng(stream)
+    )
+    return int((winners == 0).sum())
@@ -0,0 +1,325 @@
+"""Module providing the solver API for Pig and Piglet, caching the solutions under data/value_function/, and the pig-solve command line entry point."""
+
+import argparse
+import os
+
+import numpy as np
+
+from optimal_policy import precision_report
+from utilities import store_value_function
+from value_iteration import (
+    SOLVER_VERSION,
+    roll_distribution,
+    shift_value_function,
+    value_iteration,
+)
+from value_store import (
+    BINARY_EXTENSION,
+    PRECISIONS,
+    dequantize,
+    load_value_array,
+    quantize,
+    read_value_header,
+    store_value_array,
+)
+
+GAMES = ("pig", "piglet")
+CACHE_DIRECTORY = "data/value_function/cache"
+_CHECKPOINT_SUFFIX = ".checkpoint" + BINARY_EXTENSION
+
+
+def game_probabilities(game: str = "pig", dice_sides: int = 6, number_dice: int = 1) -> np.ndarray:
+    """Return the distribution of the outcome of a roll in a game (see roll_distribution).
+
+    Args:
+        game (str, optional): Game to solve, "pig" or "piglet" (coin flips). Defaults to "pig".
+        dice_sides (int, optional): Number of dice sides (Pig only). Defaults to 6.
+        number_dice (int, optional): Number of dice per roll (Pig only). Defaults to 1.
+
+    Raises:
+        ValueError: Game is not a valid value.
+
+    Returns:
+        np.ndarray: Probability of each outcome, where index 0 is the probability that the turn passes.
+    """
+    if game == "pig":
+        return roll_distribution(dice_sides, number_dice)
+    elif game == "piglet":
+        # 0.5 chance to get a tail (turn passes), 0.5 chance to increment the turn total by one
+        return np.array([0.5, 0.5])
+    raise ValueError(f"Invalid game - must be one of {', '.join(GAMES)}")
+
+
+def cache_filename(
+    game: str = "pig",
+    goal: int = 100,
+    dice_sides: int = 6,
+    epsilon: float = 1e-6,
+    number_dice: int = 1,
+    directory: str = CACHE_DIRECTORY,
+    precision: str = "float64",
+) -> str:
+    """Return the cache filename of a solution, keyed by the parameters and the solver version.
+
+    Args:
+        game (str, optional): Game to solve, "pig" or "piglet". Defaults to "pig".
+        goal (int, optional): The number of points required to win. Defaults to 100.
+        dice_sides (int, optional): Number of dice sides. Defaults to 6.
+        epsilon (float, optional): Convergence parameter. Defaults to 1e-6.
+        number_dice (int, optional): Number of dice per roll. Defaults to 1.
+        directory (str, optional): Cache directory. Defaults to CACHE_DIRECTORY.
+        precision (str, optional): Storage precision, see value_store.quantize. Defaults to "float64".
+
+    Returns:
+        str: Filename of the cached solution.
+    """
+    dice = f"_d{dice_sides}x{number_dice}" if game == "pig" else ""
+    reduced = f"_{precision}" if precision != "float64" else ""
+    name = f"goal_{goal}{dice}_eps{epsilon:g}{reduced}_v{SOLVER_VERSION}.bin"
+    return os.path.join(directory, game, name)
+
+
+def solve(
+    game: str = "pig",
+    goal: int = 100,
+    dice_sides: int = 6,
+    epsilon: float = 1e-6,
+    number_dice: int = 1,
+    method: str = "layered",
+    cache: bool = True,
+    directory: str = CACHE_DIRECTORY,
+    print_terminal: bool = False,
+    warm_start: bool = True,
+    precision: str = "float64",
+    checkpoint: bool = False,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Solve Pig or Piglet, loading the solution from the cache when it has been solved before.
+
+    Cached solutions are only used when their header matches the parameters and the current
+    SOLVER_VERSION, otherwise the game is solved again and the cache entry replaced. A new solve
+    starts from the nearest cached solution of the same game (closest goal, then tightest epsilon),
+    and can checkpoint its progress next to the cache entry so that an interrupted solve resumes.
+
+    The game is always solved at full precision. At a reduced storage precision the arrays are
+    stored (and returned) as float32 or quantized uint16 values, and what this gives up (see
+    optimal_policy.precision_report) is recorded in the header entry "precision_report".
+
+    Args:
+        game (str, optional): Game to solve, "pig" or "piglet". Defaults to "pig".
+        goal (int, optional): The number of points required to win. Defaults to 100.
+        dice_sides (int, optional): Number of dice sides (Pig only). Defaults to 6.
+        epsilon (float, optional): Convergence parameter. Defaults to 1e-6.
+        number_dice (int, optional): Number of dice per roll (Pig only). Defaults to 1.
+        method (str, optional): Solver method on a cache miss, see value_iteration. Defaults to "layered".
+        cache (bool, optional): Whether to read and write the cache. Defaults to True.
+        directory (str, optional): Cache directory. Defaults to CACHE_DIRECTORY.
+        print_terminal (bool, optional): Whether to print progress to terminal. Defaults to False.
+        warm_start (bool, optional): Whether to start a new solve from the nearest cached solution.
+            Defaults to True.
+        precision (str, optional): Storage precision, "float64", "float32" or "uint16". Defaults to "float64".
+        checkpoint (bool, optional): Whether to checkpoint the progress of a new solve (with the
+            cache), at the cost of writing the value function every few sweeps or layers. Defaults
+            to False.
+
+    Raises:
+        ValueError: Precision is not a valid value.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: Value function, value of rolling and value of
+            holding, all of shape (goal, goal, goal). Cached solutions are read-only memory maps.
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"Invalid precision - must be one of {', '.join(PRECISIONS)}")
+
+    probabilities = game_probabilities(game, dice_sides, number_dice)
+    filename = cache_filename(game, goal, dice_sides, epsilon, number_dice, directory, precision)
+    expected = {
+        "game": game,
+        "goal": goal,
+        "dice_sides": dice_sides,
+        "number_dice": number_dice,
+        "epsilon": epsilon,
+        "solver_version": SOLVER_VERSION,
+        "precision": precision,
+    }
+
+    if cache and is_valid_solution(filename, expected):
+        values, header = load_value_array(filename)
+        if print_terminal:
+            print(f"Loading cached solution {filename}")
+            _print_precision_report(header.get("precision_report"))
+        return values[0], values[1], values[2]
+
+    initial = None
+    if cache and warm_start:
+        nearest = _nearest_cached_solution(expected, directory)
+        if nearest is not None:
+            if print_terminal:
+                print(f"Warm starting from cached solution {nearest}")
+            values, _ = load_value_array(nearest)
+            initial = shift_value_function(values[0], goal)
+
+    V, V_roll, V_hold, _ = value_iteration(
+        goal=goal,
+        epsilon=epsilon,
+        method=method,
+        print_terminal=print_terminal,
+        probabilities=probabilities,
+        initial=initial,
+        checkpoint=_checkpoint_filename(filename, method) if cache and checkpoint else None,
+    )
+
+    metadata = {"game": game, "arrays": ["V", "roll", "hold"]}
+    if precision != "float64":
+        report = precision_report(V, precision, goal=goal, probabilities=probabilities)
+        metadata["precision_report"] = report
+        if print_terminal:
+            _print_precision_report(report)
+
+    if cache:
+        # Written to a temporary file first, so that a partial file is never read as a solution
+        store_value_array(
+            f"{filename}.tmp",
+            np.stack([V, V_roll, V_hold]),
+            goal=goal,
+            dice_sides=dice_sides,
+            epsilon=epsilon,
+            number_dice=number_dice,
+            solver_version=SOLVER_VERSION,
+            metadata=metadata,
+            precision=precision,
+        )
+        os.replace(f"{filename}.tmp", filename)
+        values, _ = load_value_array(filename)
+        return values[0], values[1], values[2]
+
+    values = dequantize(quantize(np.stack([V, V_roll, V_hold]), precision), precision)
+    return values[0], values[1], values[2]
+
+
+def is_valid_solution(filename: str, expected: dict) -> bool:
+    """Determine whether a stored solution is complete and matches the expected header entries.
+
+    Args:
+        filename (str): Filename of the solution written by solve.
+        expected (dict): Expected header entries, e.g. the solve parameters and solver_version.
+
+    Returns:
+        bool: Whether the solution can be used.
+    """
+    if not os.path.exists(filename):
+        return False
+    try:
+        header = read_value_header(filename)
+    except (ValueError, OSError):
+        return False
+
+    goal = expected["goal"]
+    shape = [3, goal, goal, goal]
+    size = header["offset"] + int(np.prod(shape)) * np.dtype(header.get("dtype", "<f8")).itemsize
+    return (
+        header.get("shape") == shape
+        and os.path.getsize(filename) == size
+        and all(header.get(key) == value for key, value in expected.items())
+    )
+
+
+def _print_precision_report(report: dict | None):
+    """Print what a reduced storage precision gives up, if it is reduced."""
+    if report is not None:
+        print(
+            f"Stored as {report['precision']} ({report['bytes_per_value']} bytes per value): "
+            f"max absolute error {report['max_error']:.3g}, {report['policy_flips']} policy flips"
+        )
+
+
+def _checkpoint_filename(filename: str, method: str) -> str:
+    """Return the checkpoint filename of a cache entry, per method as each resumes its own progress."""
+    return filename[: -len(BINARY_EXTENSION)] + f"_{method}" + _CHECKPOINT_SUFFIX
+
+
+def _nearest_cached_solution(expected: dict, directory: str) -> str | None:
+    """Find the cached solution of the same game and dice closest to the expected goal and epsilon."""
+    game_directory = os.path.join(directory, expected["game"])
+    if not os.path.isdir(game_directory):
+        return None
+
+    candidates = []
+    for name in os.listdir(game_directory):
+        filename = os.path.join(game_directory, name)
+        if not name.endswith(BINARY_EXTENSION) or name.endswith(_CHECKPOINT_SUFFIX):
+            continue
+        try:
+            header = read_value_header(filename)
+        except (ValueError, OSError):
+            continue
+
+        matches = all(
+            header.get(key) == expected[key]
+            for key in ["game", "dice_sides", "number_dice", "solver_version"]
+        )
+        if matches and len(header.get("shape", [])) == 4 and header["shape"][0] == 3:
+            # Prefer the closest goal, then the tightest epsilon, then the highest storage precision
+            itemsize = np.dtype(header["dtype"]).itemsize
+            candidates.append(
+                (abs(header["goal"] - expected["goal"]), header["epsilon"], -itemsize, filename)
+            )
+
+    return min(candidates)[-1] if candidates else None
+
+
+def main(argv: list[str] | None = None):
+    """Solve Pig or Piglet from the command line (installed as pig-solve).
+
+    Args:
+        argv (list[str] | None, optional): Command line arguments. Defaults to None (sys.argv).
+    """
+    parser = argparse.ArgumentParser(description="Solve Pig or Piglet by value iteration.")
+    parser.add_argument("game", nargs="?", default="pig", choices=GAMES, help="Game to solve.")
+    parser.add_argument("--goal", type=int, default=100, help="Points required to win.")
+    parser.add_argument("--dice-sides", type=int, default=6, help="Number of dice sides (Pig).")
+    parser.add_argument("--number-dice", type=int, default=1, help="Number of dice per roll (Pig).")
+    parser.add_argument("--epsilon", type=float, default=1e-6, help="Convergence parameter.")
+    parser.add_argument(
+        "--method", default="layered", choices=["sweep", "layered", "dirty"], help="Solver method."
+    )
+    parser.add_argument(
+        "--precision", default="float64", choices=list(PRECISIONS), help="Storage precision."
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Solve without the cache.")
+    parser.add_argument(
+        "--checkpoint", action="store_true", help="Checkpoint a new solve so that it can resume."
+    )
+    parser.add_argument(
+        "--output", help="Also store the value function as JSON, or binary for .bin files."
+    )
+    args = parser.parse_args(argv)
+
+    V, _, _ = solve(
+        game=args.game,
+        goal=args.goal,
+        dice_sides=args.dice_sides,
+        epsilon=args.epsilon,
+        number_dice=args.number_dice,
+        method=args.method,
+        cache=not args.no_cache,
+        print_terminal=True,
+        precision=args.precision,
+        checkpoint=args.checkpoint,
+    )
+
+    if args.output:
+        store_value_function(
+            args.output,
+            np.asarray(V),
+            dice_sides=args.dice_sides,
+            epsilon=args.epsilon,
+            number_dice=args.number_dice,
+            precision=args.precision,
+        )
+
+    print(f"Probability that the starting player wins: {V[0, 0, 0]:.6f}")
+
+
+if __name__ == "__main__":
+    main()
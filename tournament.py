@@ -0,0 +1,300 @@
+"""Module providing a round-robin tournament between Pig player configurations, with the result of every pairing cached on disk."""
+
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from pig_game import PigPlayer
+from simulation import policy_to_array, simulate_games
+from utilities import compute_confidence_interval
+
+TOURNAMENT_DIRECTORY = "data/tournament"
+
+# Keys of a player configuration, with their defaults
+CONFIG_DEFAULTS = {"strategy": "rolls", "dice_sides": 6, "number_dice": 1, "policy": None}
+
+
+def config_key(config: dict) -> str:
+    """Hash a player configuration, so that equal configurations share their cached results.
+
+    Args:
+        config (dict): Player configuration, with the "strategy", "dice_sides", "number_dice" and
+            "policy" (see PigPlayer) - missing keys take their defaults.
+
+    Returns:
+        str: Hexadecimal digest of the configuration.
+    """
+    config = {**CONFIG_DEFAULTS, **config}
+    digest = hashlib.sha256()
+    digest.update(
+        json.dumps(
+            [config["strategy"], config["dice_sides"], config["number_dice"]]
+        ).encode()
+    )
+
+    # Only the optimal strategy uses its policy, hashed by its contents
+    policy = config["policy"] if config["strategy"] == "optimal" else None
+    policy = getattr(policy, "table", policy)
+    if isinstance(policy, dict):
+        policy = policy_to_array(policy)
+    if policy is not None:
+        policy = np.ascontiguousarray(policy)
+        digest.update(json.dumps([list(policy.shape), policy.dtype.str]).encode())
+        digest.update(policy.tobytes())
+    return digest.hexdigest()
+
+
+def pairing_key(first: dict, second: dict, target: int, games: int) -> str:
+    """Hash an ordered pairing, the key of its cached result.
+
+    Args:
+        first (dict): Configuration of the starting player.
+        second (dict): Configuration of the other player.
+        target (int): Goal of the game to win.
+        games (int): Number of games played.
+
+    Returns:
+        str: Hexadecimal digest of the pairing.
+    """
+    pairing = [config_key(first), config_key(second), target, games]
+    return hashlib.sha256(json.dumps(pairing).encode()).hexdigest()
+
+
+def run_tournament(
+    roster: dict[str, dict],
+    target: int = 100,
+    games: int = 10000,
+    directory: str | None = TOURNAMENT_DIRECTORY,
+    workers: int | None = None,
+    seed: int | None = None,
+    confidence: float = 0.95,
+    method: str = "wilson",
+    print_terminal: bool = False,
+) -> dict:
+    """Play every ordered pairing of a roster, each player starting against every player (itself included).
+
+    The pairings are played with the batched engine (see simulation.simulate_games) across a pool of
+    processes. Each result is cached in the directory under the key of its configuration pair,
+    target and number of games (see pairing_key), so adding a player to the roster only plays its
+    new pairings. A cached result is reused whatever the seed it was played with.
+
+    Args:
+        roster (dict[str, dict]): Player configurations by name (see config_key).
+        target (int, optional): Goal of the game to win. Defaults to 100.
+        games (int, optional): Number of games per pairing. Defaults to 10000.
+        directory (str | None, optional): Cache directory, or None to play every pairing without
+            caching. Defaults to TOURNAMENT_DIRECTORY.
+        workers (int | None, optional): Number of worker processes, or None for one per CPU. With a
+            single worker the pairings are played in this process. Defaults to None.
+        seed (int | None, optional): Seed of the random streams of the pairings. Defaults to None.
+        confidence (float, optional): Confidence level of the intervals. Defaults to 0.95.
+        method (str, optional): Interval method of utilities.compute_confidence_interval. Defaults
+            to "wilson".
+        print_terminal (bool, optional): Whether to print progress and the results to terminal.
+            Defaults to False.
+
+    Raises:
+        ValueError: A configuration has an invalid strategy, or an optimal strategy without a policy.
+
+    Returns:
+        dict: The "names" of the roster, and matrices indexed [starting player, other player] of the
+            "wins" of the starting player, their "win_probability" with its "lower" and "upper"
+            confidence bounds, and the "first_player_advantage", how much more likely a player is to
+            win a pairing when starting than when not, P(a wins | a starts) - P(a wins | b starts).
+    """
+    names = list(roster)
+    configs = [{**CONFIG_DEFAULTS, **roster[name]} for name in names]
+
+    # Fail before playing on any configuration that cannot be played
+    for name, config in zip(names, configs):
+        _build_player(name, config, target)
+
+    n = len(names)
+    pairings = [(a, b) for a in range(n) for b in range(n)]
+    keys = {(a, b): pairing_key(configs[a], configs[b], target, games) for a, b in pairings}
+
+    # A stream per pairing derived from its key, so that its games do not depend on the roster
+    streams = {
+        pairing: np.random.SeedSequence(seed, spawn_key=(int(keys[pairing][:16], 16),))
+        for pairing in pairings
+    }
+
+    wins = np.zeros((n, n), dtype=int)
+    pending = []
+    for a, b in pairings:
+        cached = None if directory is None else _load_pairing(directory, keys[a, b])
+        if cached is None:
+            pending.append((a, b))
+        else:
+            wins[a, b] = cached["wins"]
+
+    if print_terminal:
+        print(f"{len(pending)} pairings to play, {len(pairings) - len(pending)} cached")
+
+    tasks = {
+        (a, b): (configs[a], configs[b], target, games, streams[a, b]) for a, b in pending
+    }
+
+    def record(a: int, b: int, result: int):
+        wins[a, b] = result
+        if directory is not None:
+            _store_pairing(
+                directory,
+                keys[a, b],
+                {
+                    "first": names[a],
+                    "second": names[b],
+                    "target": target,
+                    "games": games,
+                    "wins": result,
+                },
+            )
+        if print_terminal:
+            print(f"{names[a]} vs {names[b]}: {result / games:.4f}")
+
+    if workers == 1:
+        for pairing, task in tasks.items():
+            record(*pairing, _play_pairing(task))
+    elif tasks:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(_play_pairing, task): pairing for pairing, task in tasks.items()
+            }
+            for future in as_completed(futures):
+                record(*futures[future], future.result())
+
+    intervals = np.array(
+        [
+            [
+                compute_confidence_interval(
+                    wins=int(wins[a, b]), trials=games, confidence=confidence, method=method
+                )
+                for b in range(n)
+            ]
+            for a in range(n)
+        ]
+    ).reshape(n, n, 3)
+    win_probability = intervals[:, :, 0]
+
+    results = {
+        "names": names,
+        "wins": wins,
+        "win_probability": win_probability,
+        "lower": intervals[:, :, 1],
+        "upper": intervals[:, :, 2],
+        "first_player_advantage": win_probability - (1 - win_probability.T),
+    }
+
+    if print_terminal:
+        print(format_matrix(names, win_probability, "Win probability of the starting player (row)"))
+        print(format_matrix(names, results["first_player_advantage"], "First player advantage"))
+
+    return results
+
+
+def format_matrix(names: list[str], matrix: np.ndarray, title: str = "") -> str:
+    """Format a matrix of a tournament as a table, with a row and column per player.
+
+    Args:
+        names (list[str]): Names of the players.
+        matrix (np.ndarray): Matrix indexed [row player, column player].
+        title (str, optional): Title printed above the table. Defaults to "".
+
+    Returns:
+        str: The table.
+    """
+    width = max(8, *(len(name) for name in names))
+    lines = [title] if title else []
+    lines.append(" " * width + "".join(f" {name:>{width}}" for name in names))
+    for name, row in zip(names, matrix):
+        lines.append(f"{name:<{width}}" + "".join(f" {value:>{width}.4f}" for value in row))
+    return "\n".join(lines)
+
+
+def _build_player(name: str, config: dict, target: int) -> PigPlayer:
+    """Build the player of a configuration."""
+    player = PigPlayer(
+        name=name,
+        target=target,
+        strategy=config["strategy"],
+        dice_sides=config["dice_sides"],
+        number_dice=config["number_dice"],
+        policy=config["policy"] if config["strategy"] == "optimal" else None,
+    )
+    if player.strategy == "optimal" and player.policy is None:
+        raise ValueError(f"Policy must be provided for optimal strategy ({name}).")
+    return player
+
+
+def _play_pairing(task: tuple) -> int:
+    """Play the games of a pairing in a worker and return the number of wins of the starting player."""
+    first, second, target, games, stream = task
+    players = [
+        _build_player("player_1", first, target),
+        _build_player("player_2", second, target),
+    ]
+    winners = simulate_games(
+        players, n_games=games, target=target, rng=np.random.default_rng(stream)
+    )
+    return int((winners == 0).sum())
+
+
+def _load_pairing(directory: str, key: str) -> dict | None:
+    """Load the cached result of a pairing, or None if it is missing or unreadable."""
+    try:
+        with open(os.path.join(directory, f"{key}.json"), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _store_pairing(directory: str, key: str, result: dict):
+    """Store the result of a pairing, replacing any previous one only once it is completely written."""
+    os.makedirs(directory, exist_ok=True)
+    filename = os.path.join(directory, f"{key}.json")
+    with open(filename + ".tmp", "w") as f:
+        json.dump(result, f)
+    os.replace(filename + ".tmp", filename)
+
+
+def main(argv: list[str] | None = None):
+    """Run a tournament between the built-in strategies and the optimal policy from the command line.
+
+    Args:
+        argv (list[str] | None, optional): Command line arguments. Defaults to None (sys.argv).
+    """
+    from optimal_policy import extract_policy_table
+    from solver import solve
+
+    parser = argparse.ArgumentParser(description="Play a round-robin tournament of Pig strategies.")
+    parser.add_argument("--target", type=int, default=100, help="Points required to win.")
+    parser.add_argument("--games", type=int, default=10000, help="Number of games per pairing.")
+    parser.add_argument("--workers", type=int, help="Number of worker processes.")
+    parser.add_argument("--seed", type=int, help="Seed of the random streams.")
+    parser.add_argument("--directory", default=TOURNAMENT_DIRECTORY, help="Cache directory.")
+    args = parser.parse_args(argv)
+
+    V, _, _ = solve(game="pig", goal=args.target)
+    roster = {
+        "rolls": {"strategy": "rolls"},
+        "cumulativeScore": {"strategy": "cumulativeScore"},
+        "holdAt20": {"strategy": "holdAt20"},
+        "optimal": {"strategy": "optimal", "policy": extract_policy_table(V, goal=args.target)},
+    }
+    run_tournament(
+        roster,
+        target=args.target,
+        games=args.games,
+        directory=args.directory,
+        workers=args.workers,
+        seed=args.seed,
+        print_terminal=True,
+    )
+
+
+if __name__ == "__main__":
+    main()
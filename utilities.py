@@ -3,10 +3,28 @@
 import json
 import os
 import math
-import random
-from scipy.stats import norm
 
-from pig_game import PigGame, PigPlayer
+import numpy as np
+from scipy.stats import beta, norm
+
+from instrumentation import GameHook
+from optimal_policy import precision_report
+from pig_game import DiceSource, PigGame, PigPlayer
+from value_iteration import (
+    SOLVER_VERSION,
+    value_function_from_dict,
+    value_function_to_dict,
+)
+from value_store import (
+    BINARY_EXTENSION,
+    PRECISIONS,
+    is_binary_value_file,
+    load_value_array,
+    store_value_array,
+)
+
+# Decimals of the JSON values per storage precision, about the resolution of each binary data type
+_JSON_DECIMALS = {"float64": None, "float32": 7, "uint16": 5}
 
 
 def store_value_tracker(filename: str, value_tracker: list[list[float]]):
@@ -16,7 +34,7 @@ def store_value_tracker(filename: str, value_tracker: list[list[float]]):
         filename (str): Filename to store the value tracker as.
         value_tracker (list[list[float]]): Value tracker object.
     """
-    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
 
     with open(filename, "w") as f:
         json.dump(value_tracker, f)
@@ -36,53 +54,165 @@ def load_value_tracker(filename: str) -> list[list[float]]:
     return value_tracker
 
 
-def store_value_function(filename: str, V: dict[tuple[int, int, int], float]):
-    """Store the value function for pig or piglet as a JSON.
+def store_value_function(
+    filename: str,
+    V: dict[tuple[int, int, int], float] | np.ndarray,
+    dice_sides: int = 6,
+    epsilon: float | None = None,
+    number_dice: int = 1,
+    precision: str = "float64",
+) -> dict[str, str | int | float] | None:
+    """Store the value function for pig or piglet as a JSON, or in the binary format for ".bin" files.
+
+    At a reduced precision the binary array is stored as float32 or quantized uint16 (see
+    value_store.quantize), and the JSON values are rounded to a matching number of decimals. What the
+    precision gives up is then reported (see optimal_policy.precision_report), and kept in the header
+    entry "precision_report" of binary files.
 
     Args:
         filename (str): Filename to store the file as.
-        V (dict[tuple[int, int, int], float]): Value function.
+        V (dict[tuple[int, int, int], float] | np.ndarray): Value function, as a dictionary or a
+            dense (goal, goal, goal) array.
+        dice_sides (int, optional): Number of dice sides, stored in the binary header. Defaults to 6.
+        epsilon (float | None, optional): Convergence parameter, stored in the binary header.
+            Defaults to None.
+        number_dice (int, optional): Number of dice per roll, stored in the binary header. Defaults to 1.
+        precision (str, optional): Storage precision, "float64", "float32" or "uint16". Defaults to "float64".
+
+    Returns:
+        dict[str, str | int | float] | None: Precision report of a reduced precision (see
+            optimal_policy.precision_report), or None at full precision.
     """
+    if precision not in PRECISIONS:
+        raise ValueError(f"Invalid precision - must be one of {', '.join(PRECISIONS)}")
+
+    if isinstance(V, np.ndarray):
+        goal = V.shape[0]
+    else:
+        goal = 1 + max(max(state) for state in V)
+
+    report = None
+    if precision != "float64":
+        report = precision_report(
+            V if isinstance(V, np.ndarray) else value_function_from_dict(V, goal),
+            precision,
+            goal=goal,
+            dice_sides=dice_sides,
+            number_dice=number_dice,
+        )
+
+    if is_binary_value_file(filename):
+        if not isinstance(V, np.ndarray):
+            V = value_function_from_dict(V, goal)
+        store_value_array(
+            filename,
+            V,
+            goal=goal,
+            dice_sides=dice_sides,
+            epsilon=epsilon,
+            number_dice=number_dice,
+            solver_version=SOLVER_VERSION,
+            metadata=None if report is None else {"precision_report": report},
+            precision=precision,
+        )
+        return report
+
+    if isinstance(V, np.ndarray):
+        V = value_function_to_dict(V, goal)
+
     # Convert tuple keys to strings (JSON doesn't accept tuple keys)
-    string_V = {str(key): value for key, value in V.items()}
+    decimals = _JSON_DECIMALS[precision]
+    string_V = {
+        str(key): value if decimals is None else round(value, decimals) for key, value in V.items()
+    }
 
     # Ensure the directory exists
-    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
 
     # Store JSON file
     with open(filename, "w") as f:
         json.dump(string_V, f)
 
+    return report
+
 
 def load_value_function(filename: str) -> dict[tuple[int, int, int], float]:
-    """Load the value function from JSON as a dictionary.
+    """Load the value function from JSON, or from the binary format for ".bin" files, as a dictionary.
+
+    Use value_store.load_value_array to memory-map a binary file as a dense array instead.
 
     Args:
-        filename (str): Filename of the stored JSON.
+        filename (str): Filename of the stored JSON or binary file.
 
     Returns:
         dict[tuple[int, int, int], float]: Value function.
     """
+    if is_binary_value_file(filename):
+        V, header = load_value_array(filename)
+        return value_function_to_dict(V, header["goal"])
+
     with open(filename, "r") as f:
         raw_V = json.load(f)
 
     # Convert string keys to tuples (JSON doesn't accept tuple keys)
-    V = {eval(k): v for k, v in raw_V.items()}
+    V = {_parse_state(k): v for k, v in raw_V.items()}
 
     return V
 
 
+def _parse_state(key: str) -> tuple[int, ...]:
+    """Parse a state key of the form "(i, j, k)" stored in the JSON files."""
+    return tuple(int(x) for x in key.strip("()").split(","))
+
+
+def convert_value_function(
+    filename: str,
+    binary_filename: str | None = None,
+    dice_sides: int = 6,
+    epsilon: float | None = None,
+) -> str:
+    """Convert a value function stored as JSON to the binary format.
+
+    Args:
+        filename (str): Filename of the stored JSON.
+        binary_filename (str | None, optional): Filename of the binary file. Defaults to the JSON
+            filename with the ".bin" extension.
+        dice_sides (int, optional): Number of dice sides used to solve the game. Defaults to 6.
+        epsilon (float | None, optional): Convergence parameter used to solve the game. Defaults to None.
+
+    Returns:
+        str: Filename of the binary file.
+    """
+    if binary_filename is None:
+        binary_filename = os.path.splitext(filename)[0] + BINARY_EXTENSION
+
+    store_value_function(
+        binary_filename,
+        load_value_function(filename),
+        dice_sides=dice_sides,
+        epsilon=epsilon,
+    )
+    return binary_filename
+
+
 def compute_confidence_interval(
-    wins: int, trials: int, confidence: float = 0.95
+    wins: int, trials: int, confidence: float = 0.95, method: str = "wald"
 ) -> tuple[float, float, float]:
-    """Compute the confidence interval for a probability (i.e. Wald interval).
+    """Compute the confidence interval for a probability.
 
-    Get the binomial proportion confidence interval for a given confidence.
+    Get the binomial proportion confidence interval for a given confidence, using one of:
+        - "wald": normal approximation, p +/- z * sqrt(p (1 - p) / n).
+        - "wilson": Wilson score interval, which stays within [0, 1] and is accurate for small n.
+        - "clopper-pearson": exact interval from the beta distribution (conservative).
 
     Args:
         wins (int): Number of wins.
         trials (int): Number of trials.
         confidence (float, optional): Confidence level required. Defaults to 0.95.
+        method (str, optional): Interval method, "wald", "wilson" or "clopper-pearson". Defaults to "wald".
+
+    Raises:
+        ValueError: Method is not a valid value.
 
     Returns:
         tuple[float, float, float]: mean proportion, lower confidence bound, upper confidence bound.
@@ -91,30 +221,58 @@ def compute_confidence_interval(
     p = wins / trials
     # Get z-score for the confidence level
     z = norm.ppf(1 - (1 - confidence) / 2)
-    # Compute standard error
-    se = math.sqrt(p * (1 - p) / trials)
-    return (p, p - z * se, p + z * se)
+
+    if method == "wald":
+        # Compute standard error
+        se = math.sqrt(p * (1 - p) / trials)
+        return (p, p - z * se, p + z * se)
+
+    elif method == "wilson":
+        centre = (p + z**2 / (2 * trials)) / (1 + z**2 / trials)
+        half_width = (
+            z
+            * math.sqrt(p * (1 - p) / trials + z**2 / (4 * trials**2))
+            / (1 + z**2 / trials)
+        )
+        return (p, centre - half_width, centre + half_width)
+
+    elif method == "clopper-pearson":
+        alpha = 1 - confidence
+        lower = beta.ppf(alpha / 2, wins, trials - wins + 1) if wins > 0 else 0.0
+        upper = beta.ppf(1 - alpha / 2, wins + 1, trials - wins) if wins < trials else 1.0
+        return (p, float(lower), float(upper))
+
+    raise ValueError("Invalid method - must be one of wald, wilson, clopper-pearson")
 
 
 def competition(
     player_1_strategy: str,
     player_2_strategy: str,
-    optimal_policy: None | dict[tuple[int, int, int], float] = None,
+    optimal_policy: None | dict[tuple[int, int, int], str] | np.ndarray = None,
     target: int = 100,
     rounds: int = 1000,
+    seed: int | None = None,
+    hooks: list[GameHook] | None = None,
 ) -> tuple[float, float, float]:
     """Run the Pig competition and return the proportion of starter player wins with a 95% confidence interval.
 
     Args:
         player_1_strategy (str): Player 1 strategy - should be "optimal" or "holdAt20".
         player_2_strategy (str): Player 2 strategy - should be "optimal" or "holdAt20".
-        optimal_policy (None | dict[tuple[int, int, int], float], optional): Optimal Pig game policy. Defaults to None.
+        optimal_policy (None | dict[tuple[int, int, int], str] | np.ndarray, optional): Optimal Pig game policy,
+            as a dictionary or a hold threshold table. Defaults to None.
         target (int, optional): Goal of the game to win. Defaults to 100.
         rounds (int, optional): Number of simulations to run. Defaults to 1000.
+        seed (int | None, optional): Seed of the dice rolls, for reproducible results. Defaults to None.
+        hooks (list[GameHook] | None, optional): Hooks attached to every game, e.g. the aggregators of
+            instrumentation.py. Defaults to None.
 
     Returns:
         tuple[float, float, float]: mean proportion, lower confidence bound, upper confidence bound.
     """
+    # Dice source shared by all games (the players' default source if unseeded)
+    dice = None if seed is None else DiceSource(seed=seed)
+
     # Count the numner
     player_1_starter_wins = 0
 
@@ -125,15 +283,17 @@ def competition(
                 target=target,
                 strategy=player_1_strategy,
                 policy=optimal_policy if player_1_strategy == "optimal" else None,
+                dice=dice,
             ),
             PigPlayer(
                 name="player_2",
                 target=target,
                 strategy=player_2_strategy,
                 policy=optimal_policy if player_2_strategy == "optimal" else None,
+                dice=dice,
             ),
         ]
-        game = PigGame(players=players, target=target, print_terminal=False)
+        game = PigGame(players=players, target=target, print_terminal=False, hooks=hooks)
         game.simulate()
         winner = game.get_winner()
         if winner.name == "player_1":
@@ -147,26 +307,39 @@ def competition(
 
 
 def competition_random_start(
-    optimal_policy: dict[tuple[int, int, int], float],
+    optimal_policy: dict[tuple[int, int, int], str] | np.ndarray,
     target: int = 100,
     rounds: int = 1000,
+    seed: int | None = None,
+    hooks: list[GameHook] | None = None,
 ) -> tuple[float, float, float]:
     """Simulates games where one player is optimal and one is holdAt20, with random starting positions.
 
     Goal: Determine the proportion of times the optimal player wins when starting position is randomised (vs hold at 20).
 
     Args:
-        optimal_policy (dict[tuple[int, int, int], float]): Optimal Pig game policy.
+        optimal_policy (dict[tuple[int, int, int], str] | np.ndarray): Optimal Pig game policy, as a
+            dictionary or a hold threshold table.
         target (int, optional): Goal of the game to win. Defaults to 100.
         rounds (int, optional): Number of simulations to run. Defaults to 1000.
+        seed (int | None, optional): Seed of the starting positions and dice rolls, for reproducible
+            results. Defaults to None.
+        hooks (list[GameHook] | None, optional): Hooks attached to every game, e.g. the aggregators of
+            instrumentation.py. Defaults to None.
 
     Returns:
         tuple[float, float, float]: mean proportion, lower confidence bound, upper confidence bound.
     """
+    rng = np.random.default_rng(seed)
+    starts = rng.random(rounds)
+
+    # Dice source shared by all games (the players' default source if unseeded)
+    dice = None if seed is None else DiceSource(seed=rng)
+
     optimal_wins = 0
 
-    for _ in range(rounds):
-        if random.random() < 0.5:
+    for start in starts:
+        if start < 0.5:
             # Optimal goes first
             players = [
                 PigPlayer(
@@ -174,22 +347,28 @@ def competition_random_start(
                     target=target,
                     strategy="optimal",
                     policy=optimal_policy,
+                    dice=dice,
+                ),
+                PigPlayer(
+                    name="player_2", target=target, strategy="holdAt20", dice=dice
                 ),
-                PigPlayer(name="player_2", target=target, strategy="holdAt20"),
             ]
         else:
             # Optimal goes second
             players = [
-                PigPlayer(name="player_1", target=target, strategy="holdAt20"),
+                PigPlayer(
+                    name="player_1", target=target, strategy="holdAt20", dice=dice
+                ),
                 PigPlayer(
                     name="player_2",
                     target=target,
                     strategy="optimal",
                     policy=optimal_policy,
+                    dice=dice,
                 ),
             ]
 
-        game = PigGame(players=players, target=target, print_terminal=False)
+        game = PigGame(players=players, target=target, print_terminal=False, hooks=hooks)
         game.simulate()
         winner = game.get_winner()
         if winner.strategy == "optimal":
@@ -197,3 +376,22 @@ def competition_random_start(
 
     p, CI_lower, CI_upper = compute_confidence_interval(optimal_wins, rounds)
     return p, CI_lower, CI_upper
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Convert JSON value functions to the binary format."
+    )
+    parser.add_argument("filenames", nargs="+", help="JSON value function files.")
+    parser.add_argument("--dice-sides", type=int, default=6)
+    parser.add_argument("--epsilon", type=float, default=None)
+    args = parser.parse_args()
+
+    for json_filename in args.filenames:
+        print(
+            convert_value_function(
+                json_filename, dice_sides=args.dice_sides, epsilon=args.epsilon
+            )
+        )
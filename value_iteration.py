@@ -0,0 +1,678 @@
+"""Module providing a vectorised value iteration routine for the Pig game, storing the value function as a dense array."""
+
+import os
+from typing import Callable
+
+import numpy as np
+
+from value_store import load_value_array, store_value_array
+
+# Version of the solver, stored alongside solutions so that stale results can be detected
+SOLVER_VERSION = 1
+
+
+def state_mask(goal: int) -> np.ndarray:
+    """Return a boolean mask of the non-terminal states of a dense value array.
+
+    The dense arrays are indexed as [i, j, k] with shape (goal, goal, goal), but only the
+    states with i + k < goal are non-terminal.
+
+    Args:
+        goal (int): The number of points required to win.
+
+    Returns:
+        np.ndarray: Boolean array of shape (goal, goal, goal), True for non-terminal states.
+    """
+    i = np.arange(goal)[:, None, None]
+    k = np.arange(goal)[None, None, :]
+    return np.broadcast_to(i + k < goal, (goal, goal, goal))
+
+
+def roll_distribution(dice_sides: int = 6, number_dice: int = 1) -> np.ndarray:
+    """Return the distribution of the outcome of a roll of one or more dice.
+
+    A roll fails if any die shows the jeopardy value 1, and adds the sum of the dice otherwise. The
+    distribution of the sums without a 1 is the convolution of the single die distribution over the
+    faces 2, ..., dice_sides with itself number_dice times.
+
+    Args:
+        dice_sides (int, optional): Number of dice sides. Defaults to 6.
+        number_dice (int, optional): Number of dice per roll. Defaults to 1.
+
+    Returns:
+        np.ndarray: Probability of each outcome, indexed by the points added to the turn total, where
+            index 0 is the probability of rolling the jeopardy value 1 (turn passes).
+    """
+    single = np.full(dice_sides + 1, 1 / dice_sides)
+    single[:2] = 0
+
+    probabilities = np.ones(1)
+    for _ in range(number_dice):
+        probabilities = np.convolve(probabilities, single)
+
+    probabilities[0] = 1 - probabilities.sum()
+    return probabilities
+
+
+def compute_action_values(
+    V: np.ndarray,
+    goal: int = 100,
+    dice_sides: int = 6,
+    number_dice: int = 1,
+    probabilities: np.ndarray | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Compute the value of rolling and holding in every state given a dense value function.
+
+    Args:
+        V (np.ndarray): Dense value function of shape (goal, goal, goal).
+            - Indexed as [current player's score, opponent's score, turn total].
+        goal (int, optional): The number of points required to win. Defaults to 100.
+        dice_sides (int, optional): Number of dice sides. Defaults to 6.
+        number_dice (int, optional): Number of dice per roll. Defaults to 1.
+        probabilities (np.ndarray | None, optional): Distribution of the outcome of a roll (see
+            roll_distribution), replacing the dice. Defaults to None.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Value of rolling, value of holding (both of shape (goal, goal, goal)).
+    """
+    mask = state_mask(goal)
+    if probabilities is None:
+        probabilities = roll_distribution(dice_sides, number_dice)
+
+    # Pad the turn total axis so that rolling past the goal reads as a win (value 1)
+    W = np.ones((goal, goal, goal + len(probabilities)))
+    W[:, :, :goal] = np.where(mask, V, 1)
+
+    # Roll: a 1 passes the turn, (i, j, k) -> (j, i, 0), other rolls r give (i, j, k + r)
+    bust = 1 - V[:, :, 0].T  # bust[i, j] = 1 - V[j, i, 0]
+    roll_val = np.repeat(probabilities[0] * bust[:, :, None], goal, axis=2)
+    for r in np.flatnonzero(probabilities[1:]) + 1:
+        roll_val += probabilities[r] * W[:, :, r : r + goal]
+
+    # Hold: (i, j, k) -> (j, i + k, 0), reading as a win once i + k reaches the goal
+    turn_start = np.zeros((goal, 2 * goal))
+    turn_start[:, :goal] = V[:, :, 0]
+    banked = np.arange(goal)[:, None] + np.arange(goal)[None, :]  # banked[i, k] = i + k
+    hold_val = 1 - turn_start[:, banked].transpose(1, 0, 2)
+
+    return roll_val, hold_val
+
+
+def value_iteration(
+    goal: int = 100,
+    dice_sides: int = 6,
+    epsilon: float = 1e-6,
+    number_dice: int = 1,
+    method: str = "sweep",
+    print_terminal: bool = False,
+    probabilities: np.ndarray | None = None,
+    tracker=None,
+    initial: np.ndarray | None = None,
+    checkpoint: str | None = None,
+    checkpoint_every: int = 10,
+    relaxation: float = 1.0,
+    max_iterations: int = 1000,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, dict[str, int | list[int]]]:
+    """Run value iteration for the game of Pig.
+
+    Three methods are available:
+        - "sweep": back up every state in each sweep until the global change is below epsilon.
+        - "layered": solve the states in order of decreasing banked total i + j. States with a
+          given total only depend on states with the same or a higher total, so each layer is
+          solved on its own (see solve_layer) and then fixed.
+        - "dirty": back up only the states with a successor that changed by at least epsilon, in
+          place, until none are left (see _dirty).
+
+    Args:
+        goal (int, optional): The number of points required to win. Defaults to 100.
+        dice_sides (int, optional): Number of dice sides. Defaults to 6.
+        epsilon (float, optional): Convergence parameter. Defaults to 1e-6.
+        number_dice (int, optional): Number of dice per roll. Defaults to 1.
+        method (str, optional): Solver method, "sweep", "layered" or "dirty". Defaults to "sweep".
+        print_terminal (bool, optional): Whether to print progress to terminal. Defaults to False.
+        probabilities (np.ndarray | None, optional): Distribution of the outcome of a roll (see
+            roll_distribution), replacing the dice, e.g. [0.5, 0.5] for the coin of Piglet.
+            Defaults to None.
+        tracker (ConvergenceTracker | None, optional): Tracker to stream the convergence to, with a
+            record per sweep, or per layer for the layered method. Defaults to None.
+        initial (np.ndarray | None, optional): Initial value function of shape (goal, goal, goal),
+            e.g. a solution with a looser epsilon, or one for a nearby goal mapped with
+            shift_value_function. Defaults to None (all non-terminal values 0).
+        checkpoint (str | None, optional): Binary file to save the progress to every
+            checkpoint_every sweeps (or layers). An existing checkpoint is resumed from, and it is
+            removed once the solve completes. Defaults to None.
+        checkpoint_every (int, optional): Number of sweeps (or layers) between checkpoints, at
+            least 1. Defaults to 10.
+        relaxation (float, optional): Relaxation factor of the dirty method, where each backup moves
+            a value by this multiple of its change, between 0.5 and 1. Under-relaxation takes more
+            sweeps and, as the changes are scaled down, stops further from the fixed point.
+            Over-relaxation (above 1) is not accepted, as for Pig, where a player's value falls as
+            the opponent's rises, it slows convergence down or fails to converge. Defaults to 1.0.
+        max_iterations (int, optional): Largest number of sweeps of the dirty method. Defaults to 1000.
+
+    Raises:
+        ValueError: Method, relaxation, max_iterations or checkpoint_every is not a valid value,
+            relaxation or max_iterations is given for a method other than dirty, or the checkpoint
+            is from a different solve.
+        RuntimeError: The dirty method did not converge within max_iterations sweeps.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray, dict[str, int | list[int]]]: Value function, value of
+            rolling, value of holding (all of shape (goal, goal, goal)) and solver statistics.
+            - The statistics hold the number of "iterations" and state "backups" performed, and
+              for the layered method the "layer_iterations" per banked total (index i + j).
+    """
+    if method not in ("sweep", "layered", "dirty"):
+        raise ValueError("Invalid method - must be one of sweep, layered, dirty")
+    if not 0.5 <= relaxation <= 1:
+        raise ValueError("Invalid relaxation - must be between 0.5 and 1")
+    if max_iterations < 1:
+        raise ValueError("Invalid max_iterations - must be at least 1")
+    if method != "dirty" and (relaxation != 1.0 or max_iterations != 1000):
+        raise ValueError("relaxation and max_iterations are only used by the dirty method")
+    if checkpoint_every < 1:
+        raise ValueError("Invalid checkpoint_every - must be at least 1")
+
+    if probabilities is None:
+        probabilities = roll_distribution(dice_sides, number_dice)
+
+    mask = state_mask(goal)
+    V = np.where(mask, 0.0 if initial is None else initial, 1.0)
+
+    solve_key = {"method": method, "epsilon": epsilon, "probabilities": probabilities.tolist()}
+    if method == "dirty":
+        solve_key["relaxation"] = relaxation
+    resume = None
+    if checkpoint is not None and os.path.exists(checkpoint):
+        resume = _load_checkpoint(checkpoint, goal, solve_key)
+        if print_terminal:
+            print(f"Resuming from checkpoint {checkpoint}")
+
+    def save(arrays: np.ndarray, progress: dict):
+        if checkpoint is not None:
+            _store_checkpoint(checkpoint, arrays, goal, {**solve_key, **progress})
+
+    if tracker is not None:
+        tracker.start(
+            (goal, goal, goal),
+            metadata={"goal": goal, "method": method, "epsilon": epsilon},
+        )
+
+    solver = {"sweep": _sweep, "layered": _layered, "dirty": _dirty}[method]
+    options = (
+        {"relaxation": relaxation, "max_iterations": max_iterations} if method == "dirty" else {}
+    )
+    try:
+        result = solver(
+            V,
+            goal=goal,
+            probabilities=probabilities,
+            epsilon=epsilon,
+            print_terminal=print_terminal,
+            tracker=tracker,
+            resume=resume,
+            save=save,
+            checkpoint_every=checkpoint_every if checkpoint is not None else None,
+            **options,
+        )
+    finally:
+        if tracker is not None:
+            tracker.close()
+
+    if checkpoint is not None and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+
+    return result
+
+
+def _sweep(
+    V: np.ndarray,
+    goal: int,
+    probabilities: np.ndarray,
+    epsilon: float,
+    print_terminal: bool,
+    tracker,
+    resume: tuple[np.ndarray, dict] | None,
+    save: Callable[[np.ndarray, dict], None],
+    checkpoint_every: int | None,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, dict[str, int]]:
+    """Run value iteration backing up every state in each sweep (see value_iteration)."""
+    mask = state_mask(goal)
+
+    # Progress Tracker
+    progress = 1
+
+    if resume is not None:
+        V = np.array(resume[0])
+        progress = resume[1]["iteration"] + 1
+
+    while True:
+        if print_terminal:
+            print(f"Iteration {progress}")
+
+        roll_val, hold_val = compute_action_values(V, goal=goal, probabilities=probabilities)
+        new_V = np.where(mask, np.maximum(roll_val, hold_val), 1.0)
+
+        delta = np.max(np.abs(new_V - V))
+        V = new_V
+
+        if tracker is not None:
+            tracker.record(delta, V)
+
+        if delta < epsilon:
+            break
+
+        if checkpoint_every is not None and progress % checkpoint_every == 0:
+            save(V, {"iteration": progress})
+
+        progress += 1
+
+    V_roll = np.where(mask, roll_val, 0.0)
+    V_hold = np.where(mask, hold_val, 1.0)
+    stats = {"iterations": progress, "backups": progress * int(mask.sum())}
+
+    return V, V_roll, V_hold, stats
+
+
+def _layered(
+    V: np.ndarray,
+    goal: int,
+    probabilities: np.ndarray,
+    epsilon: float,
+    print_terminal: bool,
+    tracker,
+    resume: tuple[np.ndarray, dict] | None,
+    save: Callable[[np.ndarray, dict], None],
+    checkpoint_every: int | None,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, dict[str, int | list[int]]]:
+    """Run value iteration layer by layer in decreasing banked total (see value_iteration)."""
+    V_roll = np.zeros((goal, goal, goal))
+    V_hold = np.ones((goal, goal, goal))
+
+    layer_iterations = [0] * (2 * goal - 1)
+    backups = 0
+    first_total = 2 * goal - 2
+
+    # Layers above the checkpointed total are already solved
+    if resume is not None:
+        V, V_roll, V_hold = (np.array(values) for values in resume[0])
+        layer_iterations = resume[1]["layer_iterations"]
+        backups = resume[1]["backups"]
+        first_total = resume[1]["layer"] - 1
+
+    for total in range(first_total, -1, -1):
+        scores = layer_scores(total, goal)
+        opponent_scores = total - scores
+
+        values, roll_val, hold_val, iterations = solve_layer(
+            values=V[scores, opponent_scores],
+            hold_fixed=layer_hold_values(V[:, :, 0], scores, opponent_scores, goal),
+            scores=scores,
+            goal=goal,
+            probabilities=probabilities,
+            epsilon=epsilon,
+        )
+        delta = np.max(np.abs(values - V[scores, opponent_scores]))
+        V[scores, opponent_scores] = values
+        V_roll[scores, opponent_scores] = roll_val
+        V_hold[scores, opponent_scores] = hold_val
+
+        layer_iterations[total] = iterations
+        backups += iterations * int((scores[:, None] + np.arange(goal) < goal).sum())
+
+        if tracker is not None:
+            tracker.record(delta, V)
+
+        if print_terminal:
+            print(f"Layer {total}: {iterations} iterations")
+
+        if checkpoint_every is not None and total > 0 and total % checkpoint_every == 0:
+            save(
+                np.stack([V, V_roll, V_hold]),
+                {"layer": total, "layer_iterations": layer_iterations, "backups": backups},
+            )
+
+    stats = {
+        "iterations": sum(layer_iterations),
+        "backups": backups,
+        "layer_iterations": layer_iterations,
+    }
+
+    return V, V_roll, V_hold, stats
+
+
+def _dirty(
+    V: np.ndarray,
+    goal: int,
+    probabilities: np.ndarray,
+    epsilon: float,
+    print_terminal: bool,
+    tracker,
+    resume: tuple[np.ndarray, dict] | None,
+    save: Callable[[np.ndarray, dict], None],
+    checkpoint_every: int | None,
+    relaxation: float,
+    max_iterations: int,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, dict[str, int]]:
+    """Run value iteration backing up only the dirty states, in place (see value_iteration).
+
+    Every state starts dirty. A state is backed up once per sweep while dirty, and a change of at
+    least epsilon marks the states that back up from it dirty: (i, j, k - r) for the roll outcomes
+    r, and for a turn start state (i, j, 0) the states (j, i, k) that pass the turn by a roll of 1
+    and the states (a, i, j - a) that hold into it. Each sweep visits the states in decreasing
+    i + j + k, so that a roll reads values already updated in the same sweep (Gauss-Seidel).
+    """
+    mask = state_mask(goal)
+
+    # Pad the turn total axis so that rolling past the goal reads as a win (value 1), with V a view
+    # of the padded array so that backups in place are seen by later rolls
+    W = np.ones((goal, goal, goal + len(probabilities)))
+    W[:, :, :goal] = V
+    V = W[:, :, :goal]
+
+    outcomes = np.flatnonzero(probabilities[1:]) + 1
+    opponents = np.arange(goal)
+
+    progress = 1
+    backups = 0
+
+    if resume is not None:
+        V[...] = resume[0]
+        progress = resume[1]["iteration"] + 1
+        backups = resume[1]["backups"]
+
+    # States grouped by decreasing i + j + k, in the order they are visited. Within a group, the
+    # turn start states (i, j, 0) come first, those with i > j before their swapped states (j, i, 0),
+    # so that every state reads updated values of the states it holds or passes the turn into
+    i, j, k = np.nonzero(mask)
+    group = 3 * -(i + j + k) + np.where(k > 0, 2, np.where(i > j, 0, 1))
+    order = np.argsort(group, kind="stable")
+    i, j, k, group = i[order], j[order], k[order], group[order]
+    bounds = np.concatenate([[0], np.flatnonzero(np.diff(group)) + 1, [len(i)]])
+
+    dirty = mask.copy()
+
+    while dirty.any():
+        if progress > max_iterations:
+            raise RuntimeError(
+                f"Dirty value iteration did not converge within {max_iterations} sweeps."
+            )
+        if print_terminal:
+            print(f"Iteration {progress}")
+
+        delta = 0.0
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            selected = dirty[i[start:end], j[start:end], k[start:end]]
+            I = i[start:end][selected]
+            J = j[start:end][selected]
+            K = k[start:end][selected]
+            if len(I) == 0:
+                continue
+            dirty[I, J, K] = False
+            backups += len(I)
+
+            # A 1 passes the turn to (j, i, 0), holding banks the turn total as (j, i + k, 0)
+            roll_val = probabilities[0] * (1 - V[J, I, 0])
+            for r in outcomes:
+                roll_val += probabilities[r] * W[I, J, K + r]
+            hold_val = 1 - V[J, I + K, 0]
+
+            old = V[I, J, K]
+            new = np.clip(old + relaxation * (np.maximum(roll_val, hold_val) - old), 0.0, 1.0)
+            V[I, J, K] = new
+
+            change = np.abs(new - old)
+            delta = max(delta, change.max())
+            changed = change >= epsilon
+            I, J, K = I[changed], J[changed], K[changed]
+
+            for r in outcomes:
+                before = K >= r
+                dirty[I[before], J[before], K[before] - r] = True
+
+            turn_start = K == 0
+            I, J = I[turn_start], J[turn_start]
+            dirty[J, I, :] = True
+            holds = opponents[None, :] <= J[:, None]  # a <= j, holding into (i, j, 0) from (a, i, j - a)
+            rows = np.nonzero(holds)
+            dirty[opponents[rows[1]], I[rows[0]], J[rows[0]] - opponents[rows[1]]] = True
+
+        dirty &= mask
+
+        if tracker is not None:
+            tracker.record(delta, V)
+
+        if checkpoint_every is not None and progress % checkpoint_every == 0:
+            save(V, {"iteration": progress, "backups": backups})
+
+        progress += 1
+
+    roll_val, hold_val = compute_action_values(V, goal=goal, probabilities=probabilities)
+    V_roll = np.where(mask, roll_val, 0.0)
+    V_hold = np.where(mask, hold_val, 1.0)
+    stats = {"iterations": progress - 1, "backups": backups}
+
+    return V.copy(), V_roll, V_hold, stats
+
+
+def shift_value_function(V: np.ndarray, goal: int) -> np.ndarray:
+    """Map a value function onto the state space of a different goal, to warm start value iteration.
+
+    States are matched by the points each player still needs, so that (i, j, k) for the new goal
+    takes the value of (i - shift, j - shift, k) with shift = goal - old goal. Scores outside the old
+    state space are clipped to its edge.
+
+    Args:
+        V (np.ndarray): Value function of shape (old goal, old goal, old goal).
+        goal (int): The number of points required to win in the new state space.
+
+    Returns:
+        np.ndarray: Value function of shape (goal, goal, goal), with terminal states set to 1.
+    """
+    old_goal = V.shape[0]
+    shift = goal - old_goal
+
+    scores = np.clip(np.arange(goal) - shift, 0, old_goal - 1)
+    turn_totals = np.minimum(np.arange(goal), old_goal - 1)
+    shifted = V[np.ix_(scores, scores, turn_totals)]
+
+    return np.where(state_mask(goal), shifted, 1.0)
+
+
+def _load_checkpoint(checkpoint: str, goal: int, solve_key: dict) -> tuple[np.ndarray, dict]:
+    """Load a checkpoint, checking that it belongs to the same solve.
+
+    Raises:
+        ValueError: The checkpoint is from a different solve.
+    """
+    values, header = load_value_array(checkpoint, mmap=False)
+    if header["goal"] != goal or any(header.get(key) != value for key, value in solve_key.items()):
+        raise ValueError(f"Checkpoint {checkpoint} is from a different solve.")
+    return values, header
+
+
+def _store_checkpoint(checkpoint: str, arrays: np.ndarray, goal: int, metadata: dict):
+    """Store a checkpoint, replacing the previous one only once it is completely written."""
+    temporary = f"{checkpoint}.tmp"
+    store_value_array(
+        temporary, arrays, goal=goal, solver_version=SOLVER_VERSION, metadata=metadata
+    )
+    os.replace(temporary, checkpoint)
+
+
+def layer_scores(total: int, goal: int) -> np.ndarray:
+    """Return the current player's scores i of the states with banked total i + j = total.
+
+    Args:
+        total (int): Banked total of both players' scores.
+        goal (int): The number of points required to win.
+
+    Returns:
+        np.ndarray: Increasing scores i, so that the opponent scores total - i are decreasing.
+    """
+    return np.arange(max(0, total - goal + 1), min(total, goal - 1) + 1)
+
+
+def layer_hold_values(
+    turn_start: np.ndarray, scores: np.ndarray, opponent_scores: np.ndarray, goal: int
+) -> np.ndarray:
+    """Return the value of holding for the states of a layer, given the turn start values.
+
+    Holding with a positive turn total moves to a layer with a higher banked total, so these values
+    are fixed once the higher layers are solved. Holding with turn total 0 stays within the layer and
+    is recomputed by solve_layer.
+
+    Args:
+        turn_start (np.ndarray): Turn start values V[:, :, 0] of shape (goal, goal).
+        scores (np.ndarray): Current player's scores of the layer states.
+        opponent_scores (np.ndarray): Opponent's scores of the layer states.
+        goal (int): The number of points required to win.
+
+    Returns:
+        np.ndarray: Value of holding of shape (len(scores), goal), indexed by turn total.
+    """
+    # Holding at or beyond the goal reads as a win
+    padded = np.zeros((goal, 2 * goal))
+    padded[:, :goal] = turn_start
+    return 1 - padded[opponent_scores[:, None], scores[:, None] + np.arange(goal)]
+
+
+def solve_layer(
+    values: np.ndarray,
+    hold_fixed: np.ndarray,
+    scores: np.ndarray,
+    goal: int,
+    probabilities: np.ndarray,
+    epsilon: float,
+    pass_coefficient: float | np.ndarray = -1.0,
+    pass_constant: float | np.ndarray = 1.0,
+    partner: np.ndarray | None = None,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+    """Solve the coupled states of a single banked total layer.
+
+    The layer states (i, j, k) are stored as rows (i, j) in order of increasing i, so that the
+    swapped state (j, i, 0) reached by a roll of 1 is found by reversing the rows. Given the turn
+    start values x[i, j] = V[i, j, 0], one backward pass over the turn total gives every value of
+    the layer exactly. The turn start values are then found with Newton steps on x = F(1 - x[swap]),
+    solving the 2 x 2 system of each (i, j), (j, i) pair, which is exact for the piecewise linear F
+    after a handful of iterations.
+
+    Passing the turn with nothing banked (a roll of 1, or holding with turn total 0) is worth
+    pass_coefficient * x[partner] + pass_constant, which defaults to 1 - x[swap]. Other values
+    solve related problems, e.g. best_response.best_response, where the opponent's turn is
+    collapsed and the pass returns to the same row.
+
+    Args:
+        values (np.ndarray): Initial values of shape (len(scores), goal), indexed by turn total.
+        hold_fixed (np.ndarray): Value of holding from layer_hold_values.
+        scores (np.ndarray): Current player's scores of the layer states.
+        goal (int): The number of points required to win.
+        probabilities (np.ndarray): Distribution of the outcome of a roll (see roll_distribution).
+        epsilon (float): Convergence parameter.
+        pass_coefficient (float | np.ndarray, optional): Coefficient of the partner's turn start
+            value in the value of passing, per row. Defaults to -1.0.
+        pass_constant (float | np.ndarray, optional): Constant of the value of passing, per row.
+            Defaults to 1.0.
+        partner (np.ndarray | None, optional): Row whose turn start value the value of passing
+            depends on, either the row itself or a row that pairs back with it. Defaults to None
+            (the swapped row, the rows reversed).
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray, int]: Values, value of rolling, value of holding
+            and the number of iterations performed.
+    """
+    n = len(scores)
+    rows = np.arange(n)
+    partner = rows[::-1] if partner is None else partner
+    valid = scores[:, None] + np.arange(goal) < goal
+
+    # Weighted stencil over the turn total of the successful roll outcomes
+    outcomes = np.flatnonzero(probabilities[1:]) + 1
+    weights = probabilities[outcomes]
+    offsets = outcomes[:, None] + np.arange(goal)  # offsets[r, k] = k + outcome r
+
+    # Pad the turn total axis so that rolling past the goal reads as a win (value 1)
+    padded = np.ones((n, goal + len(probabilities)))
+    slope = np.zeros((n, goal + len(probabilities)))  # derivative of the values w.r.t. the pass value
+    roll_val = np.zeros((n, goal))
+    hold_val = hold_fixed.copy()
+
+    x = values[:, 0].copy()
+
+    iterations = 0
+    while True:
+        iterations += 1
+
+        # A roll of 1 or holding with turn total 0 both pass the turn: (i, j, k) -> (j, i, 0)
+        passes = pass_coefficient * x[partner] + pass_constant
+        hold_val[:, 0] = passes
+
+        for k in range(goal - 1, -1, -1):
+            roll_val[:, k] = probabilities[0] * passes + padded[:, offsets[:, k]] @ weights
+            roll_slope = probabilities[0] + slope[:, offsets[:, k]] @ weights
+            rolls = roll_val[:, k] > hold_val[:, k]
+
+            padded[:, k] = np.where(valid[:, k], np.where(rolls, roll_val[:, k], hold_val[:, k]), 1.0)
+            slope[:, k] = np.where(valid[:, k], np.where(rolls, roll_slope, float(k == 0)), 0.0)
+
+        residual = x - padded[:, 0]
+        if np.max(np.abs(residual)) < epsilon:
+            break
+
+        # Newton step on the 2 x 2 system of each pair (a single equation for a row that is its own
+        # partner), with dF the derivative of the turn start value w.r.t. the partner's
+        dF = slope[:, 0] * pass_coefficient
+        single = partner == rows
+        determinant = np.where(single, 1 - dF, 1 - dF * dF[partner])
+        numerator = np.where(single, -residual, -residual - dF * residual[partner])
+        solvable = (determinant > 1e-9) & (iterations < 50)
+        x = np.where(
+            solvable, x + numerator / np.where(solvable, determinant, 1), padded[:, 0]
+        )
+
+    return (
+        padded[:, :goal].copy(),
+        np.where(valid, roll_val, 0.0),
+        np.where(valid, hold_val, 1.0),
+        iterations,
+    )
+
+
+def value_function_to_dict(
+    V: np.ndarray, goal: int
+) -> dict[tuple[int, int, int], float]:
+    """Convert a dense value array to the dictionary form keyed by (i, j, k) states.
+
+    Args:
+        V (np.ndarray): Dense value array of shape (goal, goal, goal).
+        goal (int): The number of points required to win.
+
+    Returns:
+        dict[tuple[int, int, int], float]: Value per non-terminal state.
+    """
+    return {
+        (i, j, k): float(V[i, j, k])
+        for i in range(goal)
+        for j in range(goal)
+        for k in range(goal - i)
+    }
+
+
+def value_function_from_dict(
+    V: dict[tuple[int, int, int], float], goal: int, fill_value: float = 1.0
+) -> np.ndarray:
+    """Convert a value function dictionary keyed by (i, j, k) states to a dense array.
+
+    Args:
+        V (dict[tuple[int, int, int], float]): Value per non-terminal state.
+        goal (int): The number of points required to win.
+        fill_value (float, optional): Value of the states missing from the dictionary. Defaults to 1.0.
+
+    Returns:
+        np.ndarray: Dense value array of shape (goal, goal, goal).
+    """
+    array = np.full((goal, goal, goal), fill_value, dtype=float)
+    if V:
+        states = np.array(list(V.keys()), dtype=int)
+        array[states[:, 0], states[:, 1], states[:, 2]] = list(V.values())
+    return array
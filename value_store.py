@@ -0,0 +1,246 @@
+"""Module providing a compact binary format for dense value arrays, loaded by memory-mapping without parsing.
+
+File layout:
+    - 8 byte magic string b"PIGVALUE".
+    - 4 byte little-endian length of the header.
+    - JSON header (goal, dice_sides, number_dice, epsilon, solver_version, dtype, shape and any extra metadata,
+      such as the storage precision), padded with spaces so that the array data starts on a 64 byte boundary.
+    - Raw array data in C order.
+"""
+
+import json
+import os
+import struct
+
+import numpy as np
+
+MAGIC = b"PIGVALUE"
+BINARY_EXTENSION = ".bin"
+_ALIGNMENT = 64
+
+# Storage precisions of value arrays. Win probabilities lie in [0, 1], so "uint16" stores them
+# quantized to multiples of 1 / QUANTIZATION_SCALE
+PRECISIONS = {"float64": np.float64, "float32": np.float32, "uint16": np.uint16}
+QUANTIZATION_SCALE = 2**16 - 1
+
+
+def is_binary_value_file(filename: str) -> bool:
+    """Determine whether a filename refers to the binary value array format.
+
+    Args:
+        filename (str): Filename to check.
+
+    Returns:
+        bool: Whether the filename has the binary extension.
+    """
+    return filename.endswith(BINARY_EXTENSION)
+
+
+def store_value_array(
+    filename: str,
+    V: np.ndarray,
+    goal: int,
+    dice_sides: int = 6,
+    epsilon: float | None = None,
+    number_dice: int = 1,
+    solver_version: int | None = None,
+    metadata: dict | None = None,
+    precision: str | None = None,
+):
+    """Store a dense value array in the binary format.
+
+    Args:
+        filename (str): Filename to store the array as.
+        V (np.ndarray): Dense value array.
+        goal (int): The number of points required to win.
+        dice_sides (int, optional): Number of dice sides. Defaults to 6.
+        epsilon (float | None, optional): Convergence parameter of the solve. Defaults to None.
+        number_dice (int, optional): Number of dice per roll. Defaults to 1.
+        solver_version (int | None, optional): Version of the solver that produced V. Defaults to None.
+        metadata (dict | None, optional): Extra JSON serialisable header entries. Defaults to None.
+        precision (str | None, optional): Storage precision of a value array, one of PRECISIONS (see
+            quantize). Defaults to None (stored with the data type of V).
+    """
+    if precision is not None:
+        V = quantize(V, precision)
+        metadata = {**(metadata or {}), "precision": precision}
+    V = np.ascontiguousarray(V)
+    header = _build_header(
+        V.dtype, V.shape, goal, dice_sides, epsilon, number_dice, solver_version, metadata
+    )
+
+    # Ensure the directory exists
+    os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+
+    with open(filename, "wb") as f:
+        f.write(_encode_header(header))
+        f.write(V.tobytes())
+
+
+def create_value_array(
+    filename: str,
+    shape: tuple[int, ...],
+    goal: int,
+    dtype: np.dtype | type = np.float64,
+    dice_sides: int = 6,
+    epsilon: float | None = None,
+    number_dice: int = 1,
+    solver_version: int | None = None,
+    metadata: dict | None = None,
+) -> np.memmap:
+    """Create a binary value array file and memory-map it for writing, without holding it in memory.
+
+    The array starts as zeros, allocated sparsely by file systems that support it.
+
+    Args:
+        filename (str): Filename to create the array as.
+        shape (tuple[int, ...]): Shape of the array.
+        goal (int): The number of points required to win.
+        dtype (np.dtype | type, optional): Data type of the array. Defaults to np.float64.
+        dice_sides (int, optional): Number of dice sides. Defaults to 6.
+        epsilon (float | None, optional): Convergence parameter of the solve. Defaults to None.
+        number_dice (int, optional): Number of dice per roll. Defaults to 1.
+        solver_version (int | None, optional): Version of the solver that produces the array. Defaults to None.
+        metadata (dict | None, optional): Extra JSON serialisable header entries. Defaults to None.
+
+    Returns:
+        np.memmap: Writable memory map of the array.
+    """
+    dtype = np.dtype(dtype)
+    header = _build_header(
+        dtype, shape, goal, dice_sides, epsilon, number_dice, solver_version, metadata
+    )
+    encoded = _encode_header(header)
+
+    os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+
+    with open(filename, "wb") as f:
+        f.write(encoded)
+        f.truncate(len(encoded) + int(np.prod(shape)) * dtype.itemsize)
+
+    return np.memmap(filename, dtype=dtype, mode="r+", offset=len(encoded), shape=tuple(shape))
+
+
+def read_value_header(filename: str) -> dict:
+    """Read the header of a binary value array file.
+
+    Args:
+        filename (str): Filename of the binary file.
+
+    Returns:
+        dict: Header entries, including the "offset" of the array data.
+    """
+    with open(filename, "rb") as f:
+        return _decode_header(f)
+
+
+def load_value_array(
+    filename: str, mmap: bool = True, mode: str = "r"
+) -> tuple[np.ndarray, dict]:
+    """Load a dense value array from the binary format.
+
+    Arrays stored with "uint16" precision are dequantized to float32, so are read into memory.
+
+    Args:
+        filename (str): Filename of the binary file.
+        mmap (bool, optional): Whether to memory-map the array instead of reading it into memory.
+            Defaults to True.
+        mode (str, optional): Memory map mode, "r" (read-only) or "r+" (writable). Defaults to "r".
+
+    Returns:
+        tuple[np.ndarray, dict]: Value array, header entries.
+    """
+    header = read_value_header(filename)
+    dtype = np.dtype(header["dtype"])
+    shape = tuple(header["shape"])
+
+    if mmap:
+        V = np.memmap(filename, dtype=dtype, mode=mode, offset=header["offset"], shape=shape)
+    else:
+        with open(filename, "rb") as f:
+            f.seek(header["offset"])
+            V = np.fromfile(f, dtype=dtype, count=int(np.prod(shape))).reshape(shape)
+
+    return dequantize(V, header.get("precision")), header
+
+
+def quantize(V: np.ndarray, precision: str = "float64") -> np.ndarray:
+    """Convert a value array to a storage precision.
+
+    Args:
+        V (np.ndarray): Value array of win probabilities.
+        precision (str, optional): Storage precision, "float64", "float32" or "uint16" (win
+            probabilities rounded to the nearest multiple of 1 / QUANTIZATION_SCALE). Defaults to "float64".
+
+    Raises:
+        ValueError: Precision is not a valid value.
+
+    Returns:
+        np.ndarray: Array of the storage data type.
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"Invalid precision - must be one of {', '.join(PRECISIONS)}")
+    if precision == "uint16":
+        return np.rint(np.clip(V, 0, 1) * QUANTIZATION_SCALE).astype(np.uint16)
+    return np.asarray(V, dtype=PRECISIONS[precision])
+
+
+def dequantize(V: np.ndarray, precision: str | None = "float64") -> np.ndarray:
+    """Convert a value array of a storage precision back to win probabilities (see quantize).
+
+    Args:
+        V (np.ndarray): Array of the storage data type.
+        precision (str | None, optional): Storage precision of the array. Defaults to "float64".
+
+    Returns:
+        np.ndarray: Value array, float32 for "uint16" arrays and otherwise V itself.
+    """
+    if precision == "uint16":
+        return V.astype(np.float32) / np.float32(QUANTIZATION_SCALE)
+    return V
+
+
+def _build_header(
+    dtype: np.dtype,
+    shape: tuple[int, ...],
+    goal: int,
+    dice_sides: int,
+    epsilon: float | None,
+    number_dice: int,
+    solver_version: int | None,
+    metadata: dict | None,
+) -> dict:
+    """Build the header entries of a value array."""
+    return {
+        "goal": goal,
+        "dice_sides": dice_sides,
+        "number_dice": number_dice,
+        "epsilon": epsilon,
+        "solver_version": solver_version,
+        "dtype": np.dtype(dtype).str,
+        "shape": list(shape),
+        **(metadata or {}),
+    }
+
+
+def _encode_header(header: dict) -> bytes:
+    """Encode the header, padding it so that the array data is aligned."""
+    encoded = json.dumps(header).encode()
+    prefix = len(MAGIC) + 4
+    padding = -(prefix + len(encoded)) % _ALIGNMENT
+    encoded += b" " * padding
+    return MAGIC + struct.pack("<I", len(encoded)) + encoded
+
+
+def _decode_header(f) -> dict:
+    """Decode the header from an open binary file.
+
+    Raises:
+        ValueError: The file is not in the binary value array format.
+    """
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Not a binary value array file.")
+    (length,) = struct.unpack("<I", f.read(4))
+    header = json.loads(f.read(length))
+    header["offset"] = len(MAGIC) + 4 + length
+    return header